@@ -0,0 +1,256 @@
+# Process-wide admission control: how many quizzes are generated and browsers run at once, and how fast Gemini and SerpAPI are called
+import collections
+import threading
+import time
+from contextlib import contextmanager
+
+import config
+import metrics
+
+
+class FairSemaphore:
+    """
+    Semaphore that admits its waiters in arrival order (first come, first served),
+    so a steady stream of new requests can't keep an earlier one waiting.
+    """
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = max(1, capacity)
+
+        self._in_use = 0
+        self._waiting = collections.deque()  # Tickets in arrival order
+        self._condition = threading.Condition()
+
+    def waiting(self) -> int:
+        with self._condition:
+            return len(self._waiting)
+
+    @contextmanager
+    def slot(self, on_wait=None):
+        """
+        Holds one of the slots for the duration of the block, waiting in line for it if they're all taken
+        Args:
+            on_wait (callable): If given, on_wait(position) is called on the calling thread while waiting, whenever the 1-based position in line changes
+        """
+        ticket = object()
+        admitted = False
+        started_at = time.perf_counter()
+        last_position = None
+
+        with self._condition:
+            self._waiting.append(ticket)
+
+        try:
+            while True:
+                with self._condition:
+                    if self._waiting[0] is ticket and self._in_use < self.capacity:
+                        self._waiting.popleft()
+                        self._in_use += 1
+                        admitted = True
+
+                        # The next in line may fit in another free slot
+                        self._condition.notify_all()
+                        break
+
+                    position = self._waiting.index(ticket) + 1
+                    if position == last_position or on_wait is None:
+                        self._condition.wait(timeout=1)
+                        continue
+
+                # Called without the lock, the callback can take a while (or raise)
+                last_position = position
+                on_wait(position)
+
+            waited = time.perf_counter() - started_at
+            if last_position is not None:
+                metrics.record("admission.wait", waited, limiter=self.name, position=last_position)
+
+            yield
+
+        finally:
+            with self._condition:
+                if admitted:
+                    self._in_use -= 1
+                else:
+                    self._waiting.remove(ticket)
+                self._condition.notify_all()
+
+
+class TokenBucket:
+    """
+    Requests-per-minute limit shared by all the sessions, handing out its tokens in arrival order.
+
+    A rate-limited response (HTTP 429) pauses the bucket for the server's Retry-After (or
+    `backoff` seconds) and halves its rate. The rate then recovers step by step with each
+    successful request, back up to the configured one.
+    """
+
+    def __init__(self, name: str, per_minute: float, backoff: float = 10):
+        self.name = name
+        self.max_rate = per_minute / 60  # Tokens per second, 0 for no limit
+        self.rate = self.max_rate
+        self.capacity = max(1, per_minute / 10)  # Burst size
+        self.backoff = backoff
+
+        self._tokens = self.capacity
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0
+        self._waiting = collections.deque()
+        self._condition = threading.Condition()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self):
+        """Waits in line for a token, returning right away when the bucket has no limit."""
+        if not self.max_rate:
+            return
+
+        ticket = object()
+        started_at = time.perf_counter()
+
+        with self._condition:
+            self._waiting.append(ticket)
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+
+                    if self._waiting[0] is ticket:
+                        if now >= self._paused_until and self._tokens >= 1:
+                            self._tokens -= 1
+                            break
+
+                        delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+                    else:
+                        delay = 1
+
+                    self._condition.wait(timeout=delay)
+
+            finally:
+                self._waiting.remove(ticket)
+                self._condition.notify_all()
+
+        waited = time.perf_counter() - started_at
+        if waited >= 0.01:
+            metrics.record("admission.wait", waited, limiter=self.name)
+
+    def report_rate_limited(self, retry_after: float = None):
+        """Slows down after a 429: pausing every request, then allowing fewer of them per minute."""
+        if not self.max_rate:
+            return
+
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + (retry_after or self.backoff))
+            self._tokens = 0
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+
+        print(f"{self.name} is rate limited, pausing it for {retry_after or self.backoff}s and lowering it to {self.rate * 60:.1f} requests per minute")
+
+    def report_success(self):
+        """Raises the rate back towards the configured one after it was lowered."""
+        if self.rate < self.max_rate:
+            with self._condition:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+def rate_limit_retry_after(error: Exception):
+    """
+    Tells if an API error is a rate-limited response
+    Args:
+        error: Error raised by a client (Gemini, requests...) or an HTTP response
+    Returns:
+        float: Seconds the server asked to wait (0 if it didn't say), or None if the error isn't a 429
+    """
+    response = getattr(error, "response", None)
+    status = getattr(error, "code", None) or getattr(error, "status_code", None) or getattr(response, "status_code", None)
+
+    if status != 429:
+        return None
+
+    headers = getattr(response if response is not None else error, "headers", None) or {}
+    retry_after = headers.get("Retry-After")
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return 0
+
+
+def available_memory_mb():
+    """Memory left for the app in MB: the container's limit if it has one, or the machine's available memory (Linux only, None elsewhere)."""
+    available = []
+
+    # The container's cgroup limit (v2, then v1) minus what it already uses
+    for limit_path, usage_path in (
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+        ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes"),
+    ):
+        try:
+            with open(limit_path) as file:
+                limit = file.read().strip()
+            with open(usage_path) as file:
+                usage = int(file.read().strip())
+        except (OSError, ValueError):
+            continue
+
+        # No limit shows as "max" (v2) or as a huge number (v1)
+        if limit.isdigit() and int(limit) < 1 << 60:
+            available.append((int(limit) - usage) / (1024 * 1024))
+        break
+
+    try:
+        with open("/proc/meminfo") as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    available.append(int(line.split()[1]) / 1024)
+    except (OSError, ValueError):
+        pass
+
+    return min(available) if available else None
+
+
+def browser_slots() -> int:
+    """Returns how many browsers can run at once: the configured pool size, lowered if the memory can't hold that many."""
+    available_mb = available_memory_mb()
+    if available_mb is None:
+        return config.DRIVER_POOL_MAX_SIZE
+
+    return max(1, min(config.DRIVER_POOL_MAX_SIZE, int(available_mb // config.BROWSER_MEMORY_MB)))
+
+
+class AdmissionController:
+    """
+    The limits shared by all the sessions of the process.
+
+    Quiz generations wait in line for one of `generations` slots and every Gemini and
+    SerpAPI request takes a token from its bucket. Browsers are limited by the driver
+    pool and the job queue (already first come, first served), both sized with
+    `browsers` at startup.
+    """
+
+    def __init__(self):
+        self.generations = FairSemaphore("generations", config.GENERATION_SLOTS)
+        self.gemini = TokenBucket("Gemini", config.GEMINI_RPM, config.RATE_LIMIT_BACKOFF)
+        self.serpapi = TokenBucket("SerpAPI", config.SERPAPI_RPM, config.RATE_LIMIT_BACKOFF)
+        self.browsers = browser_slots()
+
+        if self.browsers < config.DRIVER_POOL_MAX_SIZE:
+            print(f"Running {self.browsers} browser(s) at most instead of {config.DRIVER_POOL_MAX_SIZE}, the available memory can't hold more")
+
+
+_admission_controller = None
+_admission_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """Returns the process-wide admission controller, created on first use from the config."""
+    global _admission_controller
+
+    with _admission_controller_lock:
+        if _admission_controller is None:
+            _admission_controller = AdmissionController()
+
+        return _admission_controller
@@ -0,0 +1,225 @@
+# Headless batch mode: generating and publishing many Kahoots from a manifest, without Streamlit
+#
+# Usage:
+#   KAHOOT_EMAIL=... KAHOOT_PASSWORD=... GEMINI_API_KEY=... SERPAPI_API_KEY=... \
+#   python batch.py quizzes.json --output results.csv
+#
+# The manifest is a JSON list (or CSV file) of quizzes with the fields:
+#   title (required), language, questions_num, sources, custom_prompt, description, topic, source_text
+# "sources" is a list of file paths (separated by ";" in CSV), relative to the manifest:
+# .pdf files are uploaded to Gemini and text files are added to the source text.
+import argparse
+import csv
+import getpass
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config
+from quiz_generator import generate_quiz_data
+
+
+RESULT_FIELDS = ["index", "title", "status", "kahoot_link", "error", "questions_count", "generation_seconds", "publishing_seconds", "total_seconds"]
+
+
+def load_manifest(path: str) -> list:
+    """
+    Reads the quizzes of a JSON or CSV manifest
+    Args:
+        path (str): Path of the manifest
+    Returns:
+        list: Quizzes (dicts) with their sources loaded
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as file:
+            items = list(csv.DictReader(file))
+
+        for item in items:
+            item["sources"] = [source.strip() for source in (item.get("sources") or "").split(";") if source.strip()]
+
+    else:
+        with open(path, encoding="utf-8") as file:
+            items = json.load(file)
+
+        if isinstance(items, dict):
+            items = items["quizzes"]
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    quizzes = []
+
+    for item in items:
+        if not item.get("title"):
+            raise ValueError(f"Every quiz in the manifest needs a title: {item}")
+
+        pdfs_bytes = []
+        source_texts = [item["source_text"]] if item.get("source_text") else []
+
+        for source in item.get("sources") or []:
+            source_path = os.path.join(base_dir, source)
+
+            if source_path.lower().endswith(".pdf"):
+                with open(source_path, "rb") as file:
+                    pdfs_bytes.append(file.read())
+            else:
+                with open(source_path, encoding="utf-8") as file:
+                    source_texts.append(file.read())
+
+        quizzes.append({
+            "title": item["title"].strip(),
+            "language": item.get("language") or "English",
+            "questions_num": int(item.get("questions_num") or 20),
+            "pdfs_bytes": pdfs_bytes,
+            "source_text": "\n\n".join(source_texts) or None,
+            "topic": item.get("topic") or (item["title"] if not pdfs_bytes and not source_texts else None),
+            "description": (item.get("description") or "").strip(),
+            "custom_prompt": item.get("custom_prompt") or None,
+        })
+
+    return quizzes
+
+
+def generate_item(quiz: dict, use_cache: bool = True) -> dict:
+    """Generates the quiz data of a manifest item and adds its title and description."""
+    quiz_data = generate_quiz_data(
+        quiz["title"],
+        quiz["language"],
+        quiz["questions_num"],
+        quiz["pdfs_bytes"],
+        quiz["source_text"],
+        quiz["topic"],
+        quiz["description"],
+        quiz["custom_prompt"],
+        use_cache=use_cache,
+    )
+
+    quiz_data["title"] = quiz["title"]
+    quiz_data["description"] = quiz["description"]
+
+    return quiz_data
+
+
+def run_batch(quizzes: list, kahoot_email: str = None, kahoot_password: str = None, gemini_workers: int = 2, browser_workers: int = 2, publish: bool = True, use_cache: bool = True) -> list:
+    """
+    Generates all the quizzes and pipelines each one into a browser worker as soon as it's ready
+    Args:
+        quizzes (list): Quizzes from load_manifest
+        kahoot_email (str): Kahoot email or username
+        kahoot_password (str): Kahoot password
+        gemini_workers (int): Quizzes generated at the same time
+        browser_workers (int): Kahoots published at the same time
+        publish (bool): If False, only the quiz data is generated
+        use_cache (bool): Whether to reuse the quizzes generated earlier for identical inputs
+    Returns:
+        list: One result dict per quiz, in the manifest order
+    """
+    results = [{"index": i, "title": quiz["title"], "status": "pending"} for i, quiz in enumerate(quizzes)]
+
+    def timed(func, *args):
+        start = time.perf_counter()
+        return func(*args), time.perf_counter() - start
+
+    def fail(i, stage):
+        results[i].update(status=f"{stage}_failed", error=traceback.format_exc().strip().splitlines()[-1])
+        print(f"[{i + 1}/{len(quizzes)}] {quizzes[i]['title']}: {stage} failed - {results[i]['error']}")
+
+    if publish:
+        from kahoot_creator import create_kahoot_quiz
+
+    with ThreadPoolExecutor(max_workers=gemini_workers, thread_name_prefix="batch-gemini") as gemini_executor, \
+         ThreadPoolExecutor(max_workers=browser_workers, thread_name_prefix="batch-browser") as browser_executor:
+
+        generation_futures = {}
+        for i, quiz in enumerate(quizzes):
+            generation_futures[gemini_executor.submit(timed, generate_item, quiz, use_cache)] = i
+
+        publishing_futures = {}
+        for future in as_completed(generation_futures):
+            i = generation_futures[future]
+
+            try:
+                quiz_data, seconds = future.result()
+            except Exception:
+                fail(i, "generation")
+                continue
+
+            results[i].update(status="generated", questions_count=len(quiz_data["questions"]), generation_seconds=round(seconds, 2), quiz_data=quiz_data)
+            print(f"[{i + 1}/{len(quizzes)}] {quizzes[i]['title']}: generated {len(quiz_data['questions'])} questions in {seconds:.1f}s")
+
+            if publish:
+                publishing_futures[browser_executor.submit(timed, create_kahoot_quiz, quiz_data, kahoot_email, kahoot_password)] = i
+
+        for future in as_completed(publishing_futures):
+            i = publishing_futures[future]
+
+            try:
+                (success, data), seconds = future.result()
+            except Exception:
+                fail(i, "publishing")
+                continue
+
+            results[i]["publishing_seconds"] = round(seconds, 2)
+            if success:
+                results[i].update(status="published", kahoot_link=data)
+                print(f"[{i + 1}/{len(quizzes)}] {quizzes[i]['title']}: published in {seconds:.1f}s - {data}")
+            else:
+                results[i].update(status="publishing_failed", error=data)
+                print(f"[{i + 1}/{len(quizzes)}] {quizzes[i]['title']}: publishing failed - {data}")
+
+    for result in results:
+        if result.get("generation_seconds") is not None:
+            result["total_seconds"] = round(result["generation_seconds"] + result.get("publishing_seconds", 0), 2)
+
+    return results
+
+
+def write_results(results: list, path: str):
+    """Writes the results as CSV or JSON depending on the file extension."""
+    if path.lower().endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and publish many Kahoot quizzes from a JSON/CSV manifest.")
+    parser.add_argument("manifest", help="JSON or CSV file listing the quizzes")
+    parser.add_argument("--output", default="results.json", help="Results file (.json or .csv), default: results.json")
+    parser.add_argument("--gemini-workers", type=int, default=2, help="Quizzes generated at the same time")
+    parser.add_argument("--browser-workers", type=int, default=config.DRIVER_POOL_MAX_SIZE, help="Kahoots published at the same time")
+    parser.add_argument("--no-cache", action="store_true", help="Generate new quizzes instead of reusing the ones generated earlier for identical inputs")
+    parser.add_argument("--generate-only", action="store_true", help="Only generate the quiz data (saved in the JSON results), don't publish")
+    parser.add_argument("--trace", action="store_true", help="Trace the browser's commands and waits of each Kahoot into a flame graph profile and a summary table")
+    args = parser.parse_args()
+
+    quizzes = load_manifest(args.manifest)
+
+    kahoot_email = kahoot_password = None
+    if not args.generate_only:
+        kahoot_email = os.environ.get("KAHOOT_EMAIL") or input("Kahoot email: ")
+        kahoot_password = os.environ.get("KAHOOT_PASSWORD") or getpass.getpass("Kahoot password: ")
+
+        # Letting the browser pool grow to the number of browser workers
+        config.DRIVER_POOL_MAX_SIZE = max(config.DRIVER_POOL_MAX_SIZE, args.browser_workers)
+
+        if args.trace:
+            config.KAHOOT_TRACE = 1
+
+    start = time.perf_counter()
+    results = run_batch(quizzes, kahoot_email, kahoot_password, args.gemini_workers, args.browser_workers, publish=not args.generate_only, use_cache=not args.no_cache)
+    elapsed = time.perf_counter() - start
+
+    write_results(results, args.output)
+
+    done_status = "generated" if args.generate_only else "published"
+    done_count = sum(result["status"] == done_status for result in results)
+    print(f"{done_count}/{len(results)} quizzes {done_status} in {elapsed:.1f}s, results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+# Local stand-ins for Kahoot, Gemini and SerpAPI used by the offline benchmark
+import io
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from PIL import Image
+
+
+MOCK_KAHOOT_HTML = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_kahoot.html")
+
+MOCK_WORDS = (
+    "atom cell river planet engine market poem theorem empire enzyme climate signal orbit vector "
+    "fossil budget canvas glacier harbor insect jungle kernel ladder magnet nectar oxygen prism "
+    "quartz reactor saddle tundra violin walrus yeast zenith comet delta ember falcon"
+).split()
+
+
+class MockSettings:
+    """Latencies (seconds unless noted) and payload sizes of the mock services."""
+
+    def __init__(self, **overrides):
+        # Kahoot editor (milliseconds, applied in the browser)
+        self.kahoot = {
+            "page_delay": 150,
+            "login_delay": 300,
+            "dashboard_delay": 300,
+            "ui_delay": 40,
+            "upload_delay": 300,
+            "upload_ms_per_kb": 0.5,
+            "upload_failure_rate": 0,  # Fraction of question image uploads that never finish, to benchmark flaky runs
+            "cookie_banner": True,
+            "cookie_banner_delay": 100,
+            "subscription_popup": False,
+            "popup_delay": 500,
+        }
+
+        # Gemini
+        self.gemini_upload_latency = 0.3
+        self.gemini_first_token_latency = 1.0
+        self.gemini_seconds_per_question = 0.1
+        self.gemini_image_every = 3  # Every Nth question has an image
+        self.gemini_model_latency = {}  # Model -> extra seconds before its first token
+        self.gemini_failing_models = []  # Models answering 503 (overloaded)
+        self.gemini_rpm_limit = 0  # Generation requests per minute before answering 429, like a quota (0 for no quota)
+
+        # SerpAPI and the image hosts
+        self.serpapi_latency = 0.4
+        self.serpapi_results = 10
+        self.image_latency = 0.3
+        self.image_size = (2400, 1600)
+        self.image_dead_fraction = 0  # Fraction of the originals answering 404
+        self.image_slow_fraction = 0  # Fraction of the originals served after image_slow_latency instead
+        self.image_slow_latency = 20
+
+        for name, value in overrides.items():
+            if name in self.kahoot:
+                self.kahoot[name] = value
+            else:
+                setattr(self, name, value)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    settings = None
+    server_state = None
+
+    def log_message(self, format, *args):
+        pass  # Keeping the benchmark output readable
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data, status: int = 200, headers: dict = None):
+        self._send(status, json.dumps(data).encode("utf-8"), "application/json", headers)
+
+
+class MockKahootHandler(_Handler):
+    """Serves the mock editor page and keeps the drafts and published Kahoots in memory."""
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+
+        match = re.fullmatch(r"/api/drafts/([\w-]+)", path)
+        if match:
+            self._send_json(self.server_state["drafts"].get(match.group(1), {}))
+            return
+
+        with open(MOCK_KAHOOT_HTML, encoding="utf-8") as file:
+            html = file.read()
+
+        html = html.replace("<script>", f"<script>window.MOCK_CONFIG = {json.dumps(self.settings.kahoot)};</script>\n<script>", 1)
+        self._send(200, html.encode("utf-8"), "text/html; charset=utf-8")
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        raw_body = self._body()
+
+        # Spreadsheet import: the raw XLSX file, answered with the questions it contains
+        match = re.fullmatch(r"/api/drafts/([\w-]+)/import", path)
+        if match:
+            from kahoot_xlsx import read_quiz_xlsx
+
+            self._send_json({"questions": read_quiz_xlsx(raw_body)})
+            return
+
+        body = json.loads(raw_body or b"{}")
+
+        if path == "/api/drafts":
+            draft_id = uuid.uuid4().hex
+            self.server_state["drafts"][draft_id] = {"questions": []}
+            self._send_json({"id": draft_id})
+            return
+
+        match = re.fullmatch(r"/api/drafts/([\w-]+)/publish", path)
+        if match:
+            self.server_state["published"].append(body)
+            self._send_json({"link": f"http://{self.headers['Host']}/details/{match.group(1)}"})
+            return
+
+        self._send_json({"error": "not found"}, status=404)
+
+    def do_PUT(self):
+        match = re.fullmatch(r"/api/drafts/([\w-]+)", urlparse(self.path).path)
+        if match:
+            self.server_state["drafts"][match.group(1)] = json.loads(self._body() or b"{}")
+        self._send_json({})
+
+
+class FakeSerpApiHandler(_Handler):
+    """Answers Google Images searches with results pointing at generated images served by itself."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+
+        if url.path.startswith("/search"):
+            time.sleep(self.settings.serpapi_latency)
+            query = parse_qs(url.query).get("q", [""])[0]
+            width, height = self.settings.image_size
+
+            host = self.headers["Host"]
+            images_results = [
+                {
+                    "position": i + 1,
+                    "title": f"{query} {i + 1}",
+                    "original": f"http://{host}/images/{i}.jpg?{urlencode({'q': query})}",
+                    "thumbnail": f"http://{host}/images/{i}.jpg?{urlencode({'q': query, 'thumbnail': 1})}",
+                    "original_width": width,
+                    "original_height": height,
+                    "source": "mock-images.local",
+                }
+                for i in range(self.settings.serpapi_results)
+            ]
+            self._send_json({"search_metadata": {"status": "Success"}, "images_results": images_results})
+            return
+
+        if url.path.startswith("/images/"):
+            thumbnail = "thumbnail" in url.query
+
+            # The same originals are always the dead or slow ones, like real hosts
+            host_luck = random.Random(self.path).random()
+            if not thumbnail and host_luck < self.settings.image_dead_fraction:
+                self._send_json({"error": "not found"}, status=404)
+                return
+
+            slow = not thumbnail and host_luck >= 1 - self.settings.image_slow_fraction
+            time.sleep(self.settings.image_slow_latency if slow else self.settings.image_latency)
+            self._send(200, self._image_bytes(thumbnail), "image/jpeg")
+            return
+
+        self._send_json({"error": "not found"}, status=404)
+
+    def _image_bytes(self, thumbnail: bool) -> bytes:
+        """Generates (once) a noisy JPEG, so its size is close to a real photo's."""
+        key = "thumbnail" if thumbnail else "original"
+
+        with self.server_state["lock"]:
+            if key not in self.server_state["images"]:
+                size = (300, 200) if thumbnail else self.settings.image_size
+                image = Image.frombytes("RGB", size, os.urandom(size[0] * size[1] * 3))
+                buffer = io.BytesIO()
+                image.save(buffer, format="JPEG", quality=90)
+                self.server_state["images"][key] = buffer.getvalue()
+
+            return self.server_state["images"][key]
+
+
+class FakeGeminiHandler(_Handler):
+    """Implements the Gemini endpoints the app uses: resumable file uploads, generateContent and streamGenerateContent."""
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self._body()
+
+        if url.path.startswith("/upload/"):
+            # Starting a resumable upload
+            upload_id = uuid.uuid4().hex
+            self._send_json({}, headers={"X-Goog-Upload-URL": f"http://{self.headers['Host']}/upload-session/{upload_id}"})
+            return
+
+        if url.path.startswith("/upload-session/"):
+            time.sleep(self.settings.gemini_upload_latency)
+            file_id = url.path.rsplit("/", 1)[1]
+            expiration = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + 48 * 3600))
+            self._send_json(
+                {"file": {
+                    "name": f"files/{file_id}",
+                    "uri": f"http://{self.headers['Host']}/v1beta/files/{file_id}",
+                    "mimeType": "application/pdf",
+                    "sizeBytes": str(len(body)),
+                    "state": "ACTIVE",
+                    "expirationTime": expiration,
+                }},
+                headers={"X-Goog-Upload-Status": "final"},
+            )
+            return
+
+        match = re.search(r"/models/([^/:]+):(generateContent|streamGenerateContent)", url.path)
+        if match and match.group(1) in self.settings.gemini_failing_models:
+            self._send_json({"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}}, status=503)
+            return
+
+        if match and self.settings.gemini_rpm_limit:
+            with self.server_state["lock"]:
+                now = time.time()
+                recent = [at for at in self.server_state["requests"] if now - at < 60]
+                over_quota = len(recent) >= self.settings.gemini_rpm_limit
+                self.server_state["requests"] = recent if over_quota else recent + [now]
+
+            if over_quota:
+                retry_after = 60 - (now - recent[0])
+                self._send_json(
+                    {"error": {"code": 429, "message": "Resource has been exhausted (e.g. check quota).", "status": "RESOURCE_EXHAUSTED"}},
+                    status=429, headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+                return
+
+        if match:
+            time.sleep(self.settings.gemini_model_latency.get(match.group(1), 0))
+            prompt = json.dumps(json.loads(body or b"{}"))
+            questions_count = int((re.search(r"Number of Questions: (\d+)", prompt) or [0, 10])[1])
+            quiz_text = json.dumps(self._quiz(questions_count), ensure_ascii=False, indent=2)
+
+            time.sleep(self.settings.gemini_first_token_latency)
+
+            if match.group(2) == "generateContent":
+                time.sleep(self.settings.gemini_seconds_per_question * questions_count)
+                self._send_json(self._response(quiz_text))
+            else:
+                self._stream(quiz_text, questions_count)
+            return
+
+        self._send_json({"error": {"code": 404, "message": "not found"}}, status=404)
+
+    def _quiz(self, questions_count: int) -> dict:
+        questions = []
+
+        for i in range(questions_count):
+            true_or_false = i % 4 == 3
+            # Random words, so the questions of concurrent shards don't look like near-duplicates
+            words = " ".join(random.sample(MOCK_WORDS, 6))
+            questions.append({
+                "type": "true_or_false" if true_or_false else "multiple_choice",
+                "question": f"{words.capitalize()}?",
+                "choices": ["True", "False"] if true_or_false else [f"Option {j + 1}" for j in range(4)],
+                "answer": i % 2 if true_or_false else i % 4,
+                # Unique queries, so every run measures cold image downloads instead of cache hits
+                "image": f"{words} photo" if self.settings.gemini_image_every and i % self.settings.gemini_image_every == 0 else None,
+            })
+
+        return {"questions": questions, "cover_image": " ".join(random.sample(MOCK_WORDS, 3))}
+
+    def _response(self, text: str) -> dict:
+        return {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP", "index": 0}],
+            "modelVersion": "mock-gemini",
+        }
+
+    def _stream(self, text: str, questions_count: int):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+
+        chunks_count = max(1, questions_count)
+        chunk_size = len(text) // chunks_count + 1
+
+        for start in range(0, len(text), chunk_size):
+            time.sleep(self.settings.gemini_seconds_per_question)
+            event = json.dumps(self._response(text[start:start + chunk_size]))
+            self.wfile.write(f"data: {event}\r\n\r\n".encode("utf-8"))
+            self.wfile.flush()
+
+
+class MockServices:
+    """Starts the three mock servers on free local ports, each in its own thread."""
+
+    def __init__(self, settings: MockSettings = None):
+        self.settings = settings or MockSettings()
+        self.kahoot_state = {"drafts": {}, "published": []}
+        self._servers = []
+
+        self.kahoot_url = self._start(MockKahootHandler, self.kahoot_state)
+        self.gemini_url = self._start(FakeGeminiHandler, {"requests": [], "lock": threading.Lock()})
+        self.serpapi_url = self._start(FakeSerpApiHandler, {"images": {}, "lock": threading.Lock()})
+
+    def _start(self, handler_class, server_state: dict) -> str:
+        handler = type(handler_class.__name__, (handler_class,), {"settings": self.settings, "server_state": server_state})
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.daemon_threads = True
+
+        threading.Thread(target=server.serve_forever, name=handler_class.__name__, daemon=True).start()
+        self._servers.append(server)
+
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    def environment(self) -> dict:
+        """Environment variables pointing the app at these services."""
+        return {
+            "KAHOOT_BASE_URL": self.kahoot_url,
+            "GEMINI_BASE_URL": self.gemini_url,
+            "SERPAPI_BASE_URL": self.serpapi_url,
+            "GEMINI_API_KEY": "mock-key",
+            "SERPAPI_API_KEY": "mock-key",
+        }
+
+    def stop(self):
+        for server in self._servers:
+            server.shutdown()
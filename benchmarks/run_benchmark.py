@@ -0,0 +1,249 @@
+# Offline end-to-end benchmark: generating and publishing quizzes against local mocks of Kahoot, Gemini and SerpAPI
+#
+# Usage:
+#   python benchmarks/run_benchmark.py --sizes 10 50 100 --runs 3 --output results.json
+#   python benchmarks/run_benchmark.py --baseline results.json   # Fails if a metric regressed
+#
+# Needs Chrome/Chromium and chromedriver (CHROME_BINARY/CHROMEDRIVER_PATH), but no network or credentials.
+# --generate-only skips the browser and only measures the quiz generation.
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from mock_services import MockServices, MockSettings
+
+
+# Metrics compared with the baseline, and whether higher values are better
+COMPARED_METRICS = {
+    "generation_seconds": False,
+    "publishing_seconds": False,
+    "question_p50": False,
+    "question_p95": False,
+    "login_to_editor_seconds": False,
+    "quizzes_per_minute": True,
+    "peak_rss_mb": False,
+}
+
+
+class PeakMemorySampler:
+    """Samples the resident memory of this process and its children (chromedriver, Chrome) in the background."""
+
+    def __init__(self, process_tree_rss, interval: float = 0.2):
+        self.process_tree_rss = process_tree_rss
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.process_tree_rss(os.getpid()))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile, None if there are no values."""
+    if not values:
+        return None
+
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+
+def run_once(questions_num: int, kahoot_email: str, kahoot_password: str, generate_only: bool) -> dict:
+    """Generates and publishes one quiz against the mocks, returning its timings."""
+    # Imported late, so the app modules read the mock URLs from the environment
+    import metrics
+    from driver_pool import process_tree_rss
+    from quiz_generator import generate_quiz_data
+
+    started_at = time.time()
+    result = {"questions": questions_num, "success": False}
+
+    with PeakMemorySampler(process_tree_rss) as sampler:
+        start = time.perf_counter()
+        quiz_data = generate_quiz_data(f"Benchmark {questions_num}", "English", questions_num, topic="Benchmark topic", use_cache=False)
+        quiz_data["title"] = f"Benchmark {questions_num}"
+        quiz_data["description"] = "Created by the offline benchmark"
+        result["generation_seconds"] = time.perf_counter() - start
+
+        if generate_only:
+            result["success"] = True
+        else:
+            from kahoot_creator import create_kahoot_quiz
+
+            start = time.perf_counter()
+            success, message = create_kahoot_quiz(quiz_data, kahoot_email, kahoot_password)
+            result["publishing_seconds"] = time.perf_counter() - start
+            result["success"] = success
+            if not success:
+                result["error"] = message
+
+    result["peak_rss_mb"] = sampler.peak / 1024 / 1024
+
+    # The per-question fill times of this run, from the recorded spans
+    question_events = [event for event in metrics.read_events({"kahoot.question"}) if event["time"] >= started_at]
+    result["question_seconds"] = [event["duration"] for event in question_events if "error" not in event]
+
+    # Logging in and opening the editor (the part the cookie banner and the subscription popup slow down)
+    editor_events = [event for event in metrics.read_events({"kahoot.login", "kahoot.open_editor"}) if event["time"] >= started_at]
+    if editor_events:
+        result["login_to_editor_seconds"] = sum(event["duration"] for event in editor_events)
+
+    return result
+
+
+def summarize(size: int, runs: list) -> dict:
+    """Aggregates the runs of one quiz size."""
+    successful_runs = [run for run in runs if run["success"]]
+    question_seconds = [duration for run in successful_runs for duration in run.get("question_seconds", [])]
+
+    summary = {
+        "size": size,
+        "runs": len(runs),
+        "failures": len(runs) - len(successful_runs),
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+    }
+
+    if successful_runs:
+        summary["generation_seconds"] = statistics.median(run["generation_seconds"] for run in successful_runs)
+        total_seconds = summary["generation_seconds"]
+
+        if "publishing_seconds" in successful_runs[0]:
+            summary["publishing_seconds"] = statistics.median(run["publishing_seconds"] for run in successful_runs)
+            total_seconds += summary["publishing_seconds"]
+
+        summary["quizzes_per_minute"] = 60 / total_seconds
+
+        login_seconds = [run["login_to_editor_seconds"] for run in successful_runs if "login_to_editor_seconds" in run]
+        if login_seconds:
+            summary["login_to_editor_seconds"] = statistics.median(login_seconds)
+
+    if question_seconds:
+        summary["question_p50"] = percentile(question_seconds, 0.5)
+        summary["question_p95"] = percentile(question_seconds, 0.95)
+
+    return summary
+
+
+def compare(summaries: list, baseline: list, tolerance: float) -> list:
+    """Returns the regressions of the summaries compared to the baseline, as readable lines."""
+    baseline_by_size = {summary["size"]: summary for summary in baseline}
+    regressions = []
+
+    for summary in summaries:
+        previous = baseline_by_size.get(summary["size"])
+        if not previous:
+            continue
+
+        for name, higher_is_better in COMPARED_METRICS.items():
+            if summary.get(name) is None or not previous.get(name):
+                continue
+
+            change = (summary[name] - previous[name]) / previous[name]
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append(f"{summary['size']} questions: {name} {previous[name]:.2f} -> {summary[name]:.2f} ({change:+.0%})")
+
+    return regressions
+
+
+def print_table(summaries: list):
+    columns = [
+        ("size", "Questions", "{}"),
+        ("runs", "Runs", "{}"),
+        ("failures", "Failed", "{}"),
+        ("generation_seconds", "Generation (s)", "{:.2f}"),
+        ("publishing_seconds", "Publishing (s)", "{:.2f}"),
+        ("login_to_editor_seconds", "Login to editor (s)", "{:.2f}"),
+        ("question_p50", "Question p50 (s)", "{:.2f}"),
+        ("question_p95", "Question p95 (s)", "{:.2f}"),
+        ("quizzes_per_minute", "Quizzes/min", "{:.2f}"),
+        ("peak_rss_mb", "Peak RSS (MB)", "{:.0f}"),
+    ]
+
+    rows = [[title for _, title, _ in columns]]
+    for summary in summaries:
+        rows.append([value_format.format(summary[key]) if summary.get(key) is not None else "-" for key, _, value_format in columns])
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for i, row in enumerate(rows):
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+        if i == 0:
+            print("  ".join("-" * width for width in widths))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generating and publishing quizzes against local mocks of Kahoot, Gemini and SerpAPI.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100], help="Numbers of questions per quiz, default: 10 50 100")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per size, default: 3")
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--baseline", help="Results JSON of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Relative change counted as a regression, default: 0.1")
+    parser.add_argument("--generate-only", action="store_true", help="Skip the browser and only benchmark the quiz generation")
+    parser.add_argument("--settings", help="JSON object overriding the mock latencies (see mock_services.MockSettings)")
+    args = parser.parse_args()
+
+    services = MockServices(MockSettings(**json.loads(args.settings or "{}")))
+
+    # Pointing the app at the mocks, with its own caches and metrics file, before importing it
+    os.environ.update(services.environment())
+    os.environ["KAHOOT_DATA_DIR"] = tempfile.mkdtemp(prefix="kahoot-benchmark-")
+    os.environ.pop("METRICS_FILE", None)
+
+    if not args.generate_only:
+        from driver_pool import get_driver_pool
+        get_driver_pool()  # Warming the browsers outside the measured runs, like the app does at startup
+
+    summaries = []
+    for size in args.sizes:
+        runs = []
+        for i in range(args.runs):
+            run = run_once(size, "benchmark@example.com", "benchmark", args.generate_only)
+            runs.append(run)
+            print(f"{size} questions, run {i + 1}/{args.runs}: {'ok' if run['success'] else 'failed: ' + str(run.get('error'))}")
+
+        summaries.append(summarize(size, runs))
+
+    services.stop()
+
+    print()
+    print_table(summaries)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"generate_only": args.generate_only, "summaries": summaries}, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["summaries"]
+
+        regressions = compare(summaries, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions compared to the baseline:")
+            for regression in regressions:
+                print(" ", regression)
+            sys.exit(1)
+
+        print("\nNo regressions compared to the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Measuring the Streamlit app's cold start, its per-rerun script time and the connection setup per image request
+#
+# Usage:
+#   python benchmarks/startup.py --reruns 20 --requests 50
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from mock_services import MockServices, MockSettings
+
+
+# Run in a fresh interpreter, so nothing is imported yet
+APP_RUN_SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_loaded = time.perf_counter()
+
+app = AppTest.from_file({main!r}, default_timeout=120)
+app.run()
+first_run = time.perf_counter()
+
+reruns = []
+for _ in range({reruns}):
+    rerun_start = time.perf_counter()
+    app.run()
+    reruns.append(time.perf_counter() - rerun_start)
+
+print(json.dumps({{
+    "cold_start": first_run - streamlit_loaded,
+    "reruns": reruns,
+    "modules": sorted(name for name in ("google.genai", "selenium.webdriver.chrome.webdriver", "serpapi", "PIL.Image", "pypdf", "webdriver_manager") if name in sys.modules),
+}}))
+"""
+
+
+def measure_app(reruns: int, environment: dict) -> dict:
+    """Runs main.py with Streamlit's AppTest in a new process: the first run, then the reruns."""
+    script = APP_RUN_SCRIPT.format(main=os.path.join(REPO_DIR, "main.py"), reruns=reruns)
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=REPO_DIR, env={**os.environ, **environment}, capture_output=True, text=True, check=True,
+    ).stdout
+
+    import json
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_requests(url: str, count: int) -> dict:
+    """Times image requests made with a new connection each vs through the app's pooled session."""
+    import requests
+    from clients import get_http_session
+
+    def timed(get) -> list:
+        durations = []
+        for _ in range(count):
+            start = time.perf_counter()
+            get(url).content
+            durations.append(time.perf_counter() - start)
+        return durations
+
+    return {
+        "new_connection": timed(lambda url: requests.get(url, timeout=10)),
+        "pooled_session": timed(lambda url: get_http_session().get(url, timeout=10)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the app's cold start, rerun time and per-request connection setup.")
+    parser.add_argument("--reruns", type=int, default=20, help="Reruns timed after the first run, default: 20")
+    parser.add_argument("--requests", type=int, default=50, help="Image requests timed per method, default: 50")
+    args = parser.parse_args()
+
+    services = MockServices(MockSettings(image_latency=0, image_size=(300, 200)))
+    environment = {**services.environment(), "KAHOOT_DATA_DIR": tempfile.mkdtemp(prefix="kahoot-startup-")}
+    os.environ.update(environment)
+
+    app = measure_app(args.reruns, environment)
+    print(f"Cold start (first script run):  {app['cold_start'] * 1000:.0f} ms")
+    print(f"Rerun script time (median):     {statistics.median(app['reruns']) * 1000:.1f} ms")
+    print(f"Heavy modules imported at start: {', '.join(app['modules']) or 'none'}")
+
+    image_requests = measure_requests(f"{services.serpapi_url}/images/0.jpg?thumbnail=1", args.requests)
+    for method, durations in image_requests.items():
+        print(f"Image request, {method.replace('_', ' ')} (median): {statistics.median(durations) * 1000:.2f} ms")
+
+    services.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# Keeping uploaded source files on disk instead of in the sessions' memory, shared and reference-counted across sessions
+import fcntl
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from contextlib import contextmanager
+
+import config
+
+
+CHUNK_SIZE = 1024 * 1024
+OWNER_LOCK_FILE = "owner.lock"
+ABANDONED_MIN_AGE = 60  # Seconds, so a folder isn't taken for abandoned before its process locks it
+
+
+class BlobStoreFull(Exception):
+    """Raised when storing a file would go over the store's quota."""
+
+
+def _is_process_folder_name(name: str) -> bool:
+    """Tells if a folder name is one of the processes' (a uuid4 hex)."""
+    return len(name) == 32 and all(char in "0123456789abcdef" for char in name)
+
+
+class BlobStore:
+    """
+    Content-addressed files ("<sha256>.blob") with the sessions referencing each one.
+
+    Identical uploads from several sessions are stored once. A file is deleted as soon as
+    the last session referencing it ends.
+
+    Each process keeps its files in its own subfolder of `directory`, locked for as long as
+    the process runs, so several processes (app replicas, benchmarks) can share the data
+    folder. The folders left by processes that ended, which no session can reference
+    anymore, are deleted on startup.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.root = directory
+        self.directory = os.path.join(directory, uuid.uuid4().hex)
+        self.max_bytes = max_bytes
+
+        self._sizes = {}  # digest -> size in bytes
+        self._references = {}  # digest -> ids of the sessions using it
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory)
+
+        # Held until the process ends (the OS releases it even on a crash)
+        self._owner_lock = open(os.path.join(self.directory, OWNER_LOCK_FILE), "w")
+        fcntl.flock(self._owner_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        self._remove_abandoned()
+
+    def _remove_abandoned(self):
+        """Deletes the folders of the processes that ended, and the files of the older single-folder layout."""
+        for entry in os.scandir(self.root):
+            if entry.path == self.directory:
+                continue
+
+            try:
+                # Only the store's own files, the folder may be shared with others
+                if not entry.is_dir():
+                    if entry.name.endswith((".blob", ".tmp")):
+                        os.remove(entry.path)
+                    continue
+
+                if not _is_process_folder_name(entry.name) or time.time() - entry.stat().st_mtime < ABANDONED_MIN_AGE:
+                    continue
+
+                # A folder whose lock can be taken has no process left (one without a lock file isn't the store's)
+                with open(os.path.join(entry.path, OWNER_LOCK_FILE)) as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    shutil.rmtree(entry.path)
+
+            except OSError:
+                pass  # Locked by a live process (BlockingIOError), or deleted meanwhile
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.blob")
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def put(self, session_id: str, file) -> str:
+        """
+        Stores a file for a session, streaming it to disk while hashing it
+        Args:
+            session_id (str): Session referencing the file
+            file: File-like object (like Streamlit's UploadedFile) or bytes
+        Returns:
+            str: The file's digest
+        """
+        if isinstance(file, (bytes, bytearray, memoryview)):
+            file = io.BytesIO(file)
+        file.seek(0)
+
+        hasher = hashlib.sha256()
+        size = 0
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                while True:
+                    chunk = file.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+
+                    hasher.update(chunk)
+                    temp_file.write(chunk)
+                    size += len(chunk)
+
+            digest = hasher.hexdigest()
+
+            with self._lock:
+                if digest not in self._sizes:
+                    if sum(self._sizes.values()) + size > self.max_bytes:
+                        raise BlobStoreFull("Too many files are being processed right now. Please try again in a few minutes.")
+
+                    os.replace(temp_path, self._path(digest))
+                    self._sizes[digest] = size
+
+                self._references.setdefault(digest, set()).add(session_id)
+
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return digest
+
+    @contextmanager
+    def open(self, digests: list):
+        """
+        Memory-maps stored files for reading, the pages are only loaded when read
+        Args:
+            digests (list): Digests returned by put
+        Yields:
+            list: One read-only bytes-like object per digest, valid until the block exits
+        """
+        maps = []
+        try:
+            for digest in digests:
+                with open(self._path(digest), "rb") as file:
+                    # Empty files can't be mapped
+                    maps.append(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(file.fileno()).st_size else b"")
+
+            yield maps
+
+        finally:
+            for mapped in maps:
+                if isinstance(mapped, mmap.mmap):
+                    mapped.close()
+
+    def release_session(self, session_id: str):
+        """Drops the session's references, deleting the files no other session uses."""
+        with self._lock:
+            for digest in list(self._references):
+                sessions = self._references[digest]
+                sessions.discard(session_id)
+
+                if not sessions:
+                    del self._references[digest]
+                    del self._sizes[digest]
+
+                    # Open memory maps of the file stay readable until they're closed
+                    try:
+                        os.remove(self._path(digest))
+                    except FileNotFoundError:
+                        pass
+
+
+class BlobSession:
+    """
+    A session's handle to the blob store, kept in st.session_state.
+
+    Streamlit has no session-end callback, so the session's references are released
+    when this object is garbage collected with the rest of the session state.
+    """
+
+    def __init__(self, store: BlobStore):
+        self.id = uuid.uuid4().hex
+        self.store = store
+        weakref.finalize(self, store.release_session, self.id)
+
+    def put(self, file) -> str:
+        return self.store.put(self.id, file)
+
+    def open(self, digests: list):
+        return self.store.open(digests)
+
+    def clear(self):
+        """Releases all the session's files, for when its inputs are discarded."""
+        self.store.release_session(self.id)
+
+
+_blob_store = None
+_blob_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Returns the process-wide blob store, created on first use from the config."""
+    global _blob_store
+
+    with _blob_store_lock:
+        if _blob_store is None:
+            _blob_store = BlobStore(config.BLOB_STORE_DIR, config.BLOB_STORE_MAX_MB * 1024 * 1024)
+
+        return _blob_store
@@ -0,0 +1,73 @@
+# Process-wide API clients and HTTP connection pool, created on first use so the app starts without importing them
+import threading
+
+import config
+
+
+_lock = threading.Lock()
+_gemini_client = None
+_http_session = None
+
+
+def get_gemini_client():
+    """Returns the shared Gemini client (its HTTP connections are reused across calls and sessions)."""
+    global _gemini_client
+
+    with _lock:
+        if _gemini_client is None:
+            # Importing the SDK takes most of a second, only the first generation pays for it
+            from google import genai
+
+            _gemini_client = genai.Client(
+                api_key=config.get_secret("GEMINI_API_KEY"),
+                http_options={"base_url": config.GEMINI_BASE_URL} if config.GEMINI_BASE_URL else None,
+            )
+
+        return _gemini_client
+
+
+def get_http_session():
+    """Returns the shared requests session, keeping connections to SerpAPI and the image hosts alive."""
+    global _http_session
+
+    with _lock:
+        if _http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            _http_session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=config.HTTP_POOL_HOSTS, pool_maxsize=config.HTTP_POOL_SIZE)
+            _http_session.mount("http://", adapter)
+            _http_session.mount("https://", adapter)
+
+        return _http_session
+
+
+def serpapi_search(params: dict) -> dict:
+    """
+    Runs a SerpAPI search through the shared session instead of a new connection per search
+    Args:
+        params (dict): Search parameters (engine, q, api_key...)
+    Returns:
+        dict: Search results
+    """
+    from serpapi import GoogleSearch
+    from admission import get_admission_controller, rate_limit_retry_after
+
+    limiter = get_admission_controller().serpapi
+    limiter.acquire()
+
+    search = GoogleSearch(params)
+    search.BACKEND = config.SERPAPI_BASE_URL
+    url, query = search.construct_url()
+    query["output"] = "json"
+
+    response = get_http_session().get(url, params=query, timeout=(config.IMAGE_CONNECT_TIMEOUT, config.SERPAPI_TIMEOUT))
+
+    retry_after = rate_limit_retry_after(response)
+    if retry_after is not None:
+        limiter.report_rate_limited(retry_after)
+        response.raise_for_status()
+
+    limiter.report_success()
+    return response.json()
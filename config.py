@@ -0,0 +1,142 @@
+# Settings shared by the app, read from environment variables with sensible defaults
+import os
+import tempfile
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def get_secret(name: str) -> str:
+    """Reads a secret from the environment, falling back to Streamlit's secrets.toml."""
+    if os.environ.get(name):
+        return os.environ[name]
+
+    import streamlit as st
+    return st.secrets[name]
+
+
+# Root folder for everything the app keeps on disk between sessions
+DATA_DIR = os.environ.get("KAHOOT_DATA_DIR", os.path.join(tempfile.gettempdir(), "kahoot-generator"))
+
+
+# Image Cache
+IMAGE_CACHE_DIR = os.environ.get("IMAGE_CACHE_DIR", os.path.join(DATA_DIR, "image-cache"))
+IMAGE_CACHE_MAX_MB = _env_int("IMAGE_CACHE_MAX_MB", 512)
+IMAGE_CACHE_SEARCH_TTL = _env_int("IMAGE_CACHE_SEARCH_TTL", 7 * 24 * 3600)  # SerpAPI results (seconds)
+IMAGE_CACHE_IMAGE_TTL = _env_int("IMAGE_CACHE_IMAGE_TTL", 30 * 24 * 3600)  # Transcoded JPEGs (seconds)
+
+# Maximum number of images downloaded at the same time while creating a Kahoot
+IMAGE_PREFETCH_WORKERS = _env_int("IMAGE_PREFETCH_WORKERS", 4)
+
+
+# Uploaded source files, kept on disk while a session uses them instead of in its memory
+BLOB_STORE_DIR = os.environ.get("BLOB_STORE_DIR", os.path.join(DATA_DIR, "blobs"))
+BLOB_STORE_MAX_MB = _env_int("BLOB_STORE_MAX_MB", 2048)  # For all the sessions together
+
+
+# Browser
+CHROMEDRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH", "/usr/bin/chromedriver")  # Path where Streamlit Cloud installs them
+CHROME_BINARY = os.environ.get("CHROME_BINARY", "/usr/bin/chromium")
+
+DRIVER_POOL_MAX_SIZE = _env_int("DRIVER_POOL_MAX_SIZE", 2)  # Browsers alive at the same time (idle + in use)
+DRIVER_POOL_MIN_IDLE = _env_int("DRIVER_POOL_MIN_IDLE", 1)  # Browsers kept launched and waiting for a session
+DRIVER_MAX_USES = _env_int("DRIVER_MAX_USES", 10)  # Sessions served before a browser is recycled
+DRIVER_MAX_RSS_MB = _env_int("DRIVER_MAX_RSS_MB", 1024)  # Memory of a browser's process tree before it's recycled
+BROWSER_MEMORY_MB = _env_int("BROWSER_MEMORY_MB", 500)  # Memory counted per browser when the pool is sized from the available memory
+
+# Kahoot creator site (overridden by the offline benchmark to point at its mock editor)
+KAHOOT_BASE_URL = os.environ.get("KAHOOT_BASE_URL", "https://create.kahoot.it")
+
+# Origins whose cookies and storage are wiped before a browser is reused
+KAHOOT_ORIGINS = [KAHOOT_BASE_URL, "https://kahoot.it"]
+
+
+# Gemini
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL")  # API endpoint override, unset for Google's
+GEMINI_MODELS = [model.strip() for model in os.environ.get("GEMINI_MODELS", "gemini-2.5-flash-lite,gemini-2.0-flash").split(",") if model.strip()]  # In order of preference
+GEMINI_TIMEOUT = _env_int("GEMINI_TIMEOUT", 120)  # Seconds before a model call is given up
+GEMINI_HEDGE_AFTER = _env_int("GEMINI_HEDGE_AFTER", 25)  # Seconds without a response (or first streamed question) before also trying the next model (0 disables)
+GEMINI_CIRCUIT_FAILURES = _env_int("GEMINI_CIRCUIT_FAILURES", 3)  # Failures in a row before a model is skipped
+GEMINI_CIRCUIT_COOLDOWN = _env_int("GEMINI_CIRCUIT_COOLDOWN", 120)  # Seconds a failing model is skipped
+GEMINI_UPLOAD_WORKERS = _env_int("GEMINI_UPLOAD_WORKERS", 4)  # PDFs uploaded to the File API at the same time
+GEMINI_FILE_EXPIRY_MARGIN = _env_int("GEMINI_FILE_EXPIRY_MARGIN", 3600)  # Re-upload when an uploaded file expires sooner than this (seconds)
+
+# Source PDFs: "text" sends the relevant extracted passages, "pages" uploads only the pages they're on, "file" uploads the whole PDFs
+PDF_SOURCE_MODE = os.environ.get("PDF_SOURCE_MODE", "text")
+PDF_TOKENS_PER_QUESTION = _env_int("PDF_TOKENS_PER_QUESTION", 1000)  # Source tokens kept per quiz question
+PDF_MIN_TOKENS = _env_int("PDF_MIN_TOKENS", 8000)  # Smallest source token budget, whatever the number of questions
+PDF_MIN_CHARS_PER_PAGE = _env_int("PDF_MIN_CHARS_PER_PAGE", 200)  # Below this the PDF is taken for a scan and uploaded whole
+
+# Quizzes longer than QUIZ_SHARD_SIZE questions are generated in concurrent batches (0 disables sharding)
+QUIZ_SHARD_SIZE = _env_int("QUIZ_SHARD_SIZE", 20)
+QUIZ_SHARD_WORKERS = _env_int("QUIZ_SHARD_WORKERS", 5)
+QUIZ_SHARD_RETRIES = _env_int("QUIZ_SHARD_RETRIES", 2)  # Extra attempts for a failed batch
+DUPLICATE_QUESTION_SIMILARITY = _env_float("DUPLICATE_QUESTION_SIMILARITY", 0.85)  # Text similarity ratio (0-1) above which questions count as duplicates
+
+# Generated quizzes reused for identical inputs, across sessions and restarts
+QUIZ_CACHE_FILE = os.environ.get("QUIZ_CACHE_FILE", os.path.join(DATA_DIR, "quiz-cache.sqlite3"))
+QUIZ_CACHE_TTL = _env_int("QUIZ_CACHE_TTL", 7 * 24 * 3600)  # Seconds (0 disables the cache)
+QUIZ_CACHE_MAX_MB = _env_int("QUIZ_CACHE_MAX_MB", 64)
+
+
+# Background Jobs
+JOB_WORKERS = _env_int("JOB_WORKERS", 2)  # Kahoots created at the same time
+JOB_QUEUE_LIMIT = _env_int("JOB_QUEUE_LIMIT", 10)  # Kahoots waiting for a worker before new ones are refused
+JOB_RETENTION = _env_int("JOB_RETENTION", 3600)  # How long a finished job's result is kept (seconds)
+
+
+# Admission control, shared by all the sessions
+GENERATION_SLOTS = _env_int("GENERATION_SLOTS", 4)  # Quizzes generated at the same time, the others wait in line
+GEMINI_RPM = _env_int("GEMINI_RPM", 60)  # Gemini requests per minute (0 disables the limit)
+SERPAPI_RPM = _env_int("SERPAPI_RPM", 60)  # SerpAPI searches per minute (0 disables the limit)
+RATE_LIMIT_BACKOFF = _env_float("RATE_LIMIT_BACKOFF", 10)  # Seconds to pause after a 429 that doesn't say how long to wait
+
+
+# Seconds between two checks of a browser wait (Selenium's default is 0.5)
+WAIT_POLL_INTERVAL = _env_float("WAIT_POLL_INTERVAL", 0.1)
+
+# Filling each question (title, choices and answer) with one injected script instead of element by element (1 enables).
+# Off by default: it's only been checked against the mock editor, not that the real editor's state keeps the text.
+KAHOOT_FAST_FILL = _env_int("KAHOOT_FAST_FILL", 0)
+
+# "editor" adds the questions one by one in the editor, "import" uploads them all as a spreadsheet then attaches the images
+KAHOOT_PUBLISH_MODE = os.environ.get("KAHOOT_PUBLISH_MODE", "editor")
+KAHOOT_TIME_LIMIT = _env_int("KAHOOT_TIME_LIMIT", 20)  # Seconds per question in imported quizzes
+
+# Times publishing resumes the draft after failing at the same step (login, metadata or a question) before giving up
+KAHOOT_QUESTION_RETRIES = _env_int("KAHOOT_QUESTION_RETRIES", 2)
+
+# Tracing every WebDriver command and wait of each Kahoot creation into a flame graph profile and a summary table (1 enables)
+KAHOOT_TRACE = _env_int("KAHOOT_TRACE", 0)
+KAHOOT_TRACE_DIR = os.environ.get("KAHOOT_TRACE_DIR", os.path.join(DATA_DIR, "traces"))
+
+
+# Image Downloads
+SERPAPI_BASE_URL = os.environ.get("SERPAPI_BASE_URL", "https://serpapi.com")
+SERPAPI_TIMEOUT = _env_float("SERPAPI_TIMEOUT", 30)  # Seconds to wait for search results
+IMAGE_CONNECT_TIMEOUT = _env_float("IMAGE_CONNECT_TIMEOUT", 3)  # Seconds to connect to an image host
+IMAGE_READ_TIMEOUT = _env_float("IMAGE_READ_TIMEOUT", 10)  # Seconds without receiving any data
+IMAGE_DOWNLOAD_MAX_MB = _env_int("IMAGE_DOWNLOAD_MAX_MB", 15)  # Bigger originals are skipped
+IMAGE_DOWNLOAD_DEADLINE = _env_float("IMAGE_DOWNLOAD_DEADLINE", 8)  # Seconds a whole download can take, however fast the data trickles in
+IMAGE_RACE_CANDIDATES = _env_int("IMAGE_RACE_CANDIDATES", 3)  # Most originals downloaded at the same time (best ranked first), the first one decoded wins
+IMAGE_HEDGE_AFTER = _env_float("IMAGE_HEDGE_AFTER", 1.5)  # Seconds without a decoded image before also downloading the next candidate
+IMAGE_DOWNLOAD_WORKERS = _env_int("IMAGE_DOWNLOAD_WORKERS", 16)  # Downloads running at the same time across all the images
+
+# Keep-alive connections shared by the SerpAPI searches and image downloads
+HTTP_POOL_HOSTS = _env_int("HTTP_POOL_HOSTS", 32)  # Hosts with connections kept alive
+HTTP_POOL_SIZE = _env_int("HTTP_POOL_SIZE", 8)  # Connections kept alive per host
+
+# Transcoded images, sized for Kahoot's question media area
+IMAGE_MAX_WIDTH = _env_int("IMAGE_MAX_WIDTH", 1280)
+IMAGE_MAX_HEIGHT = _env_int("IMAGE_MAX_HEIGHT", 960)
+IMAGE_MAX_KB = _env_int("IMAGE_MAX_KB", 300)
+
+
+# Timing spans of every stage, used for the ETA
+METRICS_FILE = os.environ.get("METRICS_FILE", os.path.join(DATA_DIR, "metrics.jsonl"))
+METRICS_MAX_MB = _env_int("METRICS_MAX_MB", 16)  # Size at which the file is rotated (the previous one is kept as metrics.jsonl.1)
@@ -0,0 +1,285 @@
+# Process-wide pool of warm headless Chromium drivers, so creating a Kahoot doesn't pay for a cold browser start
+import atexit
+import os
+import shutil
+import subprocess
+import threading
+from contextlib import contextmanager
+
+import config
+
+
+_versions_printed = False
+
+
+def launch_chrome():
+    """Launches a new headless Chromium driver."""
+    global _versions_printed
+
+    # Imported here so the pool's warm-up thread pays for it, not the first script run
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+
+    # Printing the browser versions once per process for debugging
+    if not _versions_printed:
+        _versions_printed = True
+
+        print("chromium:", shutil.which("chromium") or shutil.which("chromium-browser"))
+        print("chromedriver:", shutil.which("chromedriver"))
+
+        if shutil.which("chromium"):
+            print(subprocess.run([shutil.which("chromium"), "--version"], capture_output=True, text=True).stdout)
+        if shutil.which("chromedriver"):
+            print(subprocess.run([shutil.which("chromedriver"), "--version"], capture_output=True, text=True).stdout)
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--window-size=1920,1080")
+
+    chrome_options.binary_location = config.CHROME_BINARY
+    service = Service(config.CHROMEDRIVER_PATH)
+
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    driver.maximize_window()
+
+    return driver
+
+
+def process_tree_rss(pid: int) -> int:
+    """Returns the resident memory in bytes of a process and all its descendants (Linux only, 0 elsewhere)."""
+    children = {}
+    rss_pages = {}
+
+    try:
+        proc_entries = os.listdir("/proc")
+    except OSError:
+        return 0
+
+    for entry in proc_entries:
+        if not entry.isdigit():
+            continue
+
+        try:
+            with open(f"/proc/{entry}/stat") as file:
+                stat = file.read()
+            with open(f"/proc/{entry}/statm") as file:
+                statm = file.read()
+        except OSError:
+            continue  # The process exited while reading
+
+        # The process name can contain spaces, the fields after it can't
+        parent_pid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(parent_pid, []).append(int(entry))
+        rss_pages[int(entry)] = int(statm.split()[1])
+
+    total_pages = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total_pages += rss_pages.get(current, 0)
+        stack.extend(children.get(current, []))
+
+    return total_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+class DriverPool:
+    """
+    Bounded pool of WebDriver instances.
+
+    Drivers are health-checked when taken, reset (cookies, storage, extra tabs, timeouts) when given
+    back, and torn down instead of reused after `max_uses` sessions, when their browser
+    grows over `max_rss_mb`, or when the session that used them raised an exception.
+    """
+
+    def __init__(self, factory=launch_chrome, max_size: int = 2, min_idle: int = 1, max_uses: int = 10, max_rss_mb: int = 1024, reset_origins: list = ()):
+        self.factory = factory
+        self.max_size = max_size
+        self.min_idle = min(min_idle, max_size)
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self.reset_origins = list(reset_origins)
+
+        self._idle = []
+        self._uses = {}  # id(driver) -> number of sessions it served
+        self._timeouts = {}  # id(driver) -> its timeouts at launch, restored between sessions
+        self._total = 0  # Idle + in use + being launched
+        self._condition = threading.Condition()
+
+    # Lifecycle of a single driver
+    def _launch(self):
+        try:
+            driver = self.factory()
+        except BaseException:
+            with self._condition:
+                self._total -= 1
+                self._condition.notify()
+            raise
+
+        self._uses[id(driver)] = 0
+        self._timeouts[id(driver)] = driver.timeouts
+        return driver
+
+    def _teardown(self, driver):
+        self._uses.pop(id(driver), None)
+        self._timeouts.pop(id(driver), None)
+
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+        with self._condition:
+            self._total -= 1
+            self._condition.notify()
+
+    def _is_healthy(self, driver) -> bool:
+        try:
+            driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def _rss_mb(self, driver) -> float:
+        try:
+            return process_tree_rss(driver.service.process.pid) / (1024 * 1024)
+        except Exception:
+            return 0
+
+    def _reset(self, driver):
+        """Removes everything the previous session left in the browser."""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        # Timeouts a session changed (like the fast fill's script timeout)
+        driver.timeouts = self._timeouts[id(driver)]
+
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        for origin in self.reset_origins:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+
+        driver.get("about:blank")
+
+    # Pool operations
+    def warm(self):
+        """Launches drivers in the background until `min_idle` of them are waiting."""
+        def launch_missing():
+            while True:
+                with self._condition:
+                    if len(self._idle) >= self.min_idle or self._total >= self.max_size:
+                        return
+                    self._total += 1
+
+                try:
+                    driver = self._launch()
+                except Exception as e:
+                    print("Couldn't launch a warm browser:", e)
+                    return
+
+                with self._condition:
+                    self._idle.append(driver)
+                    self._condition.notify()
+
+        threading.Thread(target=launch_missing, name="driver-pool-warm", daemon=True).start()
+
+    def acquire(self, timeout: float = None):
+        """Takes a healthy idle driver, launches a new one if under `max_size`, or waits for one to be released."""
+        while True:
+            with self._condition:
+                if not self._condition.wait_for(lambda: self._idle or self._total < self.max_size, timeout=timeout):
+                    raise TimeoutError("No browser became available in time.")
+
+                if self._idle:
+                    driver = self._idle.pop()
+                else:
+                    self._total += 1
+                    driver = None
+
+            if driver is None:
+                driver = self._launch()
+            elif not self._is_healthy(driver):
+                self._teardown(driver)
+                continue
+
+            self._uses[id(driver)] += 1
+            return driver
+
+    def release(self, driver):
+        """Gives a driver back to the pool, or tears it down if it's worn out."""
+        worn_out = self._uses.get(id(driver), 0) >= self.max_uses or self._rss_mb(driver) > self.max_rss_mb
+
+        if not worn_out:
+            try:
+                self._reset(driver)
+            except Exception:
+                worn_out = True
+
+        if worn_out:
+            self._teardown(driver)
+        else:
+            with self._condition:
+                self._idle.append(driver)
+                self._condition.notify()
+
+        self.warm()
+
+    def discard(self, driver):
+        """Tears down a driver that can't be trusted anymore (e.g. after an exception)."""
+        self._teardown(driver)
+        self.warm()
+
+    @contextmanager
+    def session(self, timeout: float = None):
+        """Context manager that guarantees the driver is released or torn down on every exit path."""
+        driver = self.acquire(timeout=timeout)
+
+        try:
+            yield driver
+        except BaseException:
+            self.discard(driver)
+            raise
+
+        self.release(driver)
+
+    def close(self):
+        """Quits all the idle drivers."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+
+        for driver in idle:
+            self._teardown(driver)
+
+
+_driver_pool = None
+_driver_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> DriverPool:
+    """Returns the process-wide driver pool, created (and warmed) on first use from the config."""
+    global _driver_pool
+
+    with _driver_pool_lock:
+        if _driver_pool is None:
+            # Imported here, the admission module isn't needed before the pool exists
+            from admission import get_admission_controller
+
+            _driver_pool = DriverPool(
+                max_size=get_admission_controller().browsers,
+                min_idle=config.DRIVER_POOL_MIN_IDLE,
+                max_uses=config.DRIVER_MAX_USES,
+                max_rss_mb=config.DRIVER_MAX_RSS_MB,
+                reset_origins=config.KAHOOT_ORIGINS,
+            )
+            _driver_pool.warm()
+
+            # Not leaving orphan browsers behind when the app stops
+            atexit.register(_driver_pool.close)
+
+        return _driver_pool
@@ -0,0 +1,87 @@
+# Estimating how long creating a Kahoot takes, learned from the recorded timing spans
+import statistics
+
+import config
+import metrics
+
+
+# Used until enough runs are recorded (the original hand-tuned formula)
+DEFAULT_FIXED_SECONDS = 43
+DEFAULT_QUESTION_SECONDS = 5
+
+# Runs/questions needed before a learned value replaces the default
+MIN_SAMPLES = 3
+
+
+def fit_eta_model(publish_mode: str = None) -> dict:
+    """
+    Fits the ETA from the recorded spans of previous Kahoot creations
+    Args:
+        publish_mode (str): Only learning from runs published this way ("editor" or "import"), the configured one if not given
+    Returns:
+        dict: "fixed" seconds per Kahoot (login, editor, metadata, import, saving) and
+              "question" seconds per (type, has_image), each only if learned
+    """
+    publish_mode = publish_mode or config.KAHOOT_PUBLISH_MODE
+
+    # Runs recorded before the import mode existed were all published through the editor
+    events = [
+        event for event in metrics.read_events({"kahoot.question", "kahoot.create"})
+        if event.get("publish_mode", "editor") == publish_mode
+    ]
+
+    question_durations = {}  # (type, has_image) -> durations
+    run_questions_time = {}  # run_id -> seconds spent on the questions
+    fixed_durations = []
+
+    for event in events:
+        if event["name"] == "kahoot.question" and "error" not in event:
+            key = (event.get("type"), bool(event.get("has_image")))
+            question_durations.setdefault(key, []).append(event["duration"])
+            run_questions_time[event.get("run_id")] = run_questions_time.get(event.get("run_id"), 0) + event["duration"]
+
+    for event in events:
+        if event["name"] == "kahoot.create" and event.get("success") and event.get("run_id") in run_questions_time:
+            fixed_durations.append(event["duration"] - run_questions_time[event["run_id"]])
+
+    model = {"question": {}, "publish_mode": publish_mode}
+
+    if len(fixed_durations) >= MIN_SAMPLES:
+        model["fixed"] = statistics.median(fixed_durations)
+
+    for key, durations in question_durations.items():
+        if len(durations) >= MIN_SAMPLES:
+            model["question"][key] = statistics.median(durations)
+
+    return model
+
+
+def estimate_creation_time(quiz_data: dict, model: dict = None) -> int:
+    """
+    Estimates the seconds needed to create the Kahoot of this quiz data
+    Args:
+        quiz_data (dict): Quiz data
+        model (dict): Fitted model, fitted from the metrics file if not given
+    Returns:
+        int: Estimated seconds
+    """
+    model = model if model is not None else fit_eta_model()
+    learned = model["question"]
+
+    seconds = model.get("fixed", DEFAULT_FIXED_SECONDS)
+
+    for question in quiz_data["questions"]:
+        # Imported questions only take time of their own when an image is attached to them
+        if model.get("publish_mode") == "import" and not question.get("image"):
+            continue
+
+        key = (question["type"].lower(), bool(question.get("image")))
+
+        if key in learned:
+            seconds += learned[key]
+        else:
+            # Falling back to questions with the same image presence, then to the default
+            similar = [duration for (question_type, has_image), duration in learned.items() if has_image == key[1]]
+            seconds += statistics.mean(similar) if similar else DEFAULT_QUESTION_SECONDS
+
+    return round(seconds)
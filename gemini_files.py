@@ -0,0 +1,87 @@
+# Uploads source PDFs to the Gemini File API once per content, shared by all the sessions
+import datetime
+import hashlib
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+
+class GeminiFileCache:
+    """
+    Caches Gemini File API handles by the SHA-256 of the uploaded bytes.
+
+    Gemini deletes uploaded files after 48 hours, so a handle is reused only while
+    its expiration time is more than `expiry_margin` seconds away.
+    """
+
+    def __init__(self, expiry_margin: int = 3600, max_workers: int = 4):
+        self.expiry_margin = datetime.timedelta(seconds=expiry_margin)
+        self.max_workers = max_workers
+
+        self._files = {}  # digest -> uploaded file
+        self._digest_locks = {}  # digest -> lock, so two sessions never upload the same bytes at once
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, uploaded_file) -> bool:
+        expiration_time = getattr(uploaded_file, "expiration_time", None)
+        if expiration_time is None:
+            return False
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return expiration_time - self.expiry_margin > now
+
+    def _upload(self, client, digest: str, pdf_bytes: bytes):
+        with self._lock:
+            digest_lock = self._digest_locks.setdefault(digest, threading.Lock())
+
+        with digest_lock:
+            uploaded_file = self._files.get(digest)
+            if uploaded_file is not None and self._is_fresh(uploaded_file):
+                return uploaded_file
+
+            # Uploading straight from memory, no temporary file
+            uploaded_file = client.files.upload(
+                file=io.BytesIO(pdf_bytes),
+                config={"display_name": "Source PDF", "mime_type": "application/pdf"},
+            )
+            self._files[digest] = uploaded_file
+
+            return uploaded_file
+
+    def upload_pdfs(self, client, pdfs_bytes: list) -> list:
+        """
+        Uploads the PDFs that aren't already uploaded, concurrently
+        Args:
+            client (genai.Client): Gemini client
+            pdfs_bytes (list): List of PDF files (bytes)
+        Returns:
+            list: Uploaded files, in the same order as `pdfs_bytes`
+        """
+        digests = [hashlib.sha256(pdf_bytes).hexdigest() for pdf_bytes in pdfs_bytes]
+
+        if len(pdfs_bytes) <= 1:
+            return [self._upload(client, digest, pdf_bytes) for digest, pdf_bytes in zip(digests, pdfs_bytes)]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="gemini-upload") as executor:
+            futures = [executor.submit(self._upload, client, digest, pdf_bytes) for digest, pdf_bytes in zip(digests, pdfs_bytes)]
+            return [future.result() for future in futures]
+
+
+_file_cache = None
+_file_cache_lock = threading.Lock()
+
+
+def get_file_cache() -> GeminiFileCache:
+    """Returns the process-wide Gemini file cache."""
+    global _file_cache
+
+    with _file_cache_lock:
+        if _file_cache is None:
+            _file_cache = GeminiFileCache(
+                expiry_margin=config.GEMINI_FILE_EXPIRY_MARGIN,
+                max_workers=config.GEMINI_UPLOAD_WORKERS,
+            )
+
+        return _file_cache
@@ -0,0 +1,220 @@
+# Calling Gemini models in order of preference: hedging slow calls on the next model and skipping models that keep failing
+import queue
+import threading
+import time
+
+import config
+import metrics
+from admission import get_admission_controller, rate_limit_retry_after
+
+
+class AllModelsFailed(Exception):
+    """Raised when every model failed or timed out."""
+
+    def __init__(self, errors: dict):
+        self.errors = errors  # model -> exception
+        super().__init__("All the Gemini models failed: " + "; ".join(f"{model}: {error!r}" for model, error in errors.items()))
+
+
+class CircuitBreaker:
+    """
+    Tracks the consecutive failures of each model, shared by all the sessions.
+
+    After `failure_threshold` failures in a row (errors, overloads or timeouts) a model
+    is skipped for `cooldown` seconds, then tried again. One success resets its streak.
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown: int = 120):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self._failures = {}  # model -> consecutive failures
+        self._opened_at = {}  # model -> time it started being skipped
+        self._lock = threading.Lock()
+
+    def is_open(self, model: str) -> bool:
+        """Whether the model is currently being skipped."""
+        with self._lock:
+            opened_at = self._opened_at.get(model)
+            return opened_at is not None and time.time() - opened_at < self.cooldown
+
+    def available(self, models: list) -> list:
+        """Returns the models that aren't being skipped, in order (all of them if every model is, trying beats failing)."""
+        closed_models = [model for model in models if not self.is_open(model)]
+        return closed_models or list(models)
+
+    def record_success(self, model: str):
+        with self._lock:
+            self._failures[model] = 0
+            self._opened_at.pop(model, None)
+
+    def record_failure(self, model: str):
+        with self._lock:
+            self._failures[model] = self._failures.get(model, 0) + 1
+
+            if self._failures[model] >= self.failure_threshold:
+                if model not in self._opened_at or time.time() - self._opened_at[model] >= self.cooldown:
+                    print(f"Gemini model {model} failed {self._failures[model]} times in a row, skipping it for {self.cooldown}s")
+                self._opened_at[model] = time.time()
+
+
+def call_models(models: list, call, on_question=None, timeout: float = 120, hedge_after: float = 0, **attributes):
+    """
+    Calls the first available model, sending a hedged request to the next one if it's slow,
+    and falling back to the next one if it fails. The first valid response wins.
+    Args:
+        models (list): Model names in order of preference
+        call (callable): call(model, emit) returns the parsed response or raises, emit(question) being None when not streaming
+        on_question (callable): If given, on_question(index, question) is called with the questions streamed by the attempt in the lead
+        timeout (float): Seconds before an attempt is given up
+        hedge_after (float): Seconds without a response (or a first streamed question) before the next model is also tried, 0 to disable
+        attributes: Extra fields recorded with the metrics
+    Returns:
+        The winning attempt's response
+    """
+    breaker = get_circuit_breaker()
+    limiter = get_admission_controller().gemini
+    candidates = breaker.available(models)
+    skipped = [model for model in models if model not in candidates]
+
+    events = queue.Queue()  # (kind, attempt index, value), the attempts' threads never call on_question themselves
+    attempts = []
+    errors = {}
+    started_at = time.perf_counter()
+
+    def launch(hedged: bool):
+        index = len(attempts)
+        model = candidates[index]
+        attempts.append({"model": model, "started_at": time.perf_counter(), "questions": [], "finished": False, "hedged": hedged})
+
+        def run():
+            emit = (lambda question: events.put(("question", index, question))) if on_question is not None else None
+
+            # Waiting for the requests-per-minute limit doesn't count towards the timeout or the hedge
+            limiter.acquire()
+            attempts[index]["started_at"] = time.perf_counter()
+
+            try:
+                with metrics.span("gemini.generate", **attributes, model=model, streamed=emit is not None, attempt=index, hedged=hedged):
+                    response = call(model, emit)
+            except Exception as e:
+                retry_after = rate_limit_retry_after(e)
+                if retry_after is not None:
+                    limiter.report_rate_limited(retry_after)
+
+                if not attempts[index]["finished"]:  # Already counted if it timed out
+                    breaker.record_failure(model)
+                events.put(("error", index, e))
+            else:
+                limiter.report_success()
+                if not attempts[index]["finished"]:
+                    breaker.record_success(model)
+                events.put(("done", index, response))
+
+        threading.Thread(target=run, name=f"gemini-{model}", daemon=True).start()
+
+    def running() -> list:
+        return [attempt for attempt in attempts if not attempt["finished"]]
+
+    def fail(index: int, error: Exception):
+        attempts[index]["finished"] = True
+        errors[attempts[index]["model"]] = error
+        print(f"Gemini model {attempts[index]['model']} failed:", repr(error))
+
+    def replay(index: int):
+        """Makes the attempt the one shown, re-sending its questions from index 0."""
+        for i, question in enumerate(attempts[index]["questions"]):
+            on_question(i, question)
+
+    owner = None  # Attempt whose streamed questions are being shown
+
+    launch(hedged=False)
+
+    while True:
+        if not running():
+            if len(attempts) == len(candidates):
+                metrics.record("gemini.call", time.perf_counter() - started_at, **attributes, success=False, attempts=len(attempts), skipped=skipped)
+                raise AllModelsFailed(errors)
+
+            # Falling back to the next model
+            launch(hedged=False)
+
+        # Waking up for the earliest timeout or hedge
+        now = time.perf_counter()
+        deadlines = [attempt["started_at"] + timeout for attempt in running()]
+
+        newest = attempts[-1]
+        can_hedge = hedge_after and len(attempts) < len(candidates) and not newest["finished"] and not newest["questions"]
+        if can_hedge:
+            deadlines.append(newest["started_at"] + hedge_after)
+
+        try:
+            kind, index, value = events.get(timeout=max(0, min(deadlines) - now))
+        except queue.Empty:
+            now = time.perf_counter()
+
+            for index, attempt in enumerate(attempts):
+                if not attempt["finished"] and now - attempt["started_at"] >= timeout:
+                    # The thread can't be interrupted, its late result is ignored
+                    breaker.record_failure(attempt["model"])
+                    fail(index, TimeoutError(f"No response in {timeout}s"))
+                    if owner == index:
+                        owner = None
+
+            if can_hedge and not newest["finished"] and now - newest["started_at"] >= hedge_after:
+                print(f"Gemini model {newest['model']} is slow, also trying {candidates[len(attempts)]}")
+                launch(hedged=True)
+            continue
+
+        attempt = attempts[index]
+        if attempt["finished"]:
+            continue  # Late event of an attempt given up on
+
+        if kind == "question":
+            attempt["questions"].append(value)
+
+            if owner is None:
+                owner = index
+                replay(index)
+            elif owner == index:
+                on_question(len(attempt["questions"]) - 1, value)
+
+        elif kind == "error":
+            fail(index, value)
+            if owner == index:
+                owner = None
+
+        elif kind == "done":
+            attempt["finished"] = True
+
+            # Showing the winner's questions if another attempt was in the lead
+            if on_question is not None and owner != index:
+                replay(index)
+
+            metrics.record(
+                "gemini.call",
+                time.perf_counter() - started_at,
+                **attributes,
+                success=True,
+                model=attempt["model"],
+                attempts=len(attempts),
+                retries=len(errors),
+                hedged=any(attempt["hedged"] for attempt in attempts),
+                skipped=skipped,
+            )
+            return value
+
+
+_circuit_breaker = None
+_circuit_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Returns the process-wide circuit breaker."""
+    global _circuit_breaker
+
+    with _circuit_breaker_lock:
+        if _circuit_breaker is None:
+            _circuit_breaker = CircuitBreaker(config.GEMINI_CIRCUIT_FAILURES, config.GEMINI_CIRCUIT_COOLDOWN)
+
+        return _circuit_breaker
@@ -0,0 +1,152 @@
+# On-disk cache for image searches and the JPEGs downloaded for them, shared by all the sessions
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import config
+
+
+class ImageCache:
+    """
+    Content-addressed cache keyed by the normalized image query.
+
+    Every query has up to two entries: "<key>.json" with the SerpAPI image results
+    and "<key>.jpg" with the transcoded JPEG. The modification time of an entry
+    is the time it was written (used for the TTLs) and the access time is the last
+    time it was read (used for the LRU eviction). Entries are written to a temporary
+    file and renamed into place, so concurrent sessions never read partial files.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, search_ttl: int, image_ttl: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.search_ttl = search_ttl
+        self.image_ttl = image_ttl
+
+        self._lock = threading.Lock()
+        self._counters = {"search_hits": 0, "search_misses": 0, "image_hits": 0, "image_misses": 0}
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Lowercases the query and collapses its whitespace."""
+        return " ".join(query.lower().split())
+
+    def _path(self, query: str, extension: str) -> str:
+        key = hashlib.sha256(self.normalize_query(query).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.{extension}")
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _read(self, path: str, ttl: int):
+        """Returns the entry's bytes if it exists and hasn't expired, else None."""
+        try:
+            written_at = os.stat(path).st_mtime
+            if time.time() - written_at > ttl:
+                os.remove(path)
+                return None
+
+            with open(path, "rb") as file:
+                data = file.read()
+
+            # Marking the entry as recently used while keeping its write time
+            os.utime(path, (time.time(), written_at))
+            return data
+
+        except FileNotFoundError:
+            return None
+
+    def _write(self, path: str, data: bytes):
+        """Atomically writes an entry then evicts the least recently used ones if over the size cap."""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total_size = 0
+
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".tmp"):
+                continue  # Being written by another session
+
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # Removed by another session
+
+            entries.append((stat.st_atime, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+        if total_size <= self.max_bytes:
+            return
+
+        # Removing the least recently used entries until the cache is back under 90% of its cap
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+            total_size -= size
+            if total_size <= self.max_bytes * 0.9:
+                break
+
+    def get_search(self, query: str):
+        """Returns the cached SerpAPI image results for the query, or None on a miss."""
+        data = self._read(self._path(query, "json"), self.search_ttl)
+        self._count("search_hits" if data is not None else "search_misses")
+
+        return json.loads(data) if data is not None else None
+
+    def put_search(self, query: str, images_results: list):
+        self._write(self._path(query, "json"), json.dumps(images_results).encode("utf-8"))
+
+    def get_image(self, query: str):
+        """Returns the cached JPEG bytes for the query, or None on a miss."""
+        data = self._read(self._path(query, "jpg"), self.image_ttl)
+        self._count("image_hits" if data is not None else "image_misses")
+
+        return data
+
+    def put_image(self, query: str, jpeg_bytes: bytes):
+        self._write(self._path(query, "jpg"), jpeg_bytes)
+
+    def stats(self) -> dict:
+        """Returns the hit/miss counters of this process."""
+        with self._lock:
+            return dict(self._counters)
+
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    """Returns the process-wide image cache, created on first use from the config."""
+    global _image_cache
+
+    with _image_cache_lock:
+        if _image_cache is None:
+            _image_cache = ImageCache(
+                directory=config.IMAGE_CACHE_DIR,
+                max_bytes=config.IMAGE_CACHE_MAX_MB * 1024 * 1024,
+                search_ttl=config.IMAGE_CACHE_SEARCH_TTL,
+                image_ttl=config.IMAGE_CACHE_IMAGE_TTL,
+            )
+
+        return _image_cache
@@ -0,0 +1,336 @@
+# Finding images for the quiz and converting them to files the Kahoot editor accepts
+import io
+import math
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+import config
+import metrics
+from clients import get_http_session, serpapi_search
+from image_cache import get_image_cache
+
+
+# Formats PIL decodes (by the URL's extension), the others cost more in the ranking
+PREFERRED_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+UNDECODABLE_EXTENSIONS = {".svg", ".svgz", ".avif", ".heic"}
+
+
+class DownloadCancelled(Exception):
+    """Raised inside a download when another candidate already won the race."""
+
+
+class HostStats:
+    """
+    How fast and reliable each image host has been in this process, so the known-fast
+    hosts are ranked first. Durations are averaged with an exponential moving average.
+    """
+
+    def __init__(self, smoothing: float = 0.3):
+        self.smoothing = smoothing
+        self._seconds = {}  # host -> average seconds per download
+        self._failure_rate = {}  # host -> average of failures (1) and successes (0)
+        self._lock = threading.Lock()
+
+    def record(self, host: str, seconds: float, success: bool):
+        with self._lock:
+            previous = self._seconds.get(host, seconds)
+            self._seconds[host] = previous + self.smoothing * (seconds - previous)
+
+            previous = self._failure_rate.get(host, 0.0 if success else 1.0)
+            self._failure_rate[host] = previous + self.smoothing * ((0.0 if success else 1.0) - previous)
+
+    def expected_cost(self, host: str) -> float:
+        """Seconds a download from the host is expected to cost, failures counting as a few seconds (1 for unknown hosts)."""
+        with self._lock:
+            if host not in self._seconds:
+                return 1.0
+            return self._seconds[host] + 3 * self._failure_rate[host]
+
+
+def candidate_cost(result: dict, position: int, host_stats: HostStats):
+    """
+    Ranks a SerpAPI image result from its metadata alone, lower is better
+    Args:
+        result (dict): One of the search's "images_results"
+        position (int): Its position in the results (SerpAPI's relevance order)
+        host_stats (HostStats): Speed and reliability of the hosts so far
+    Returns:
+        float: Cost, or None if the image can't be used at all
+    """
+    url = result.get("original")
+    if not url:
+        return None
+
+    extension = os.path.splitext(urlparse(url).path)[1].lower()
+    if extension in UNDECODABLE_EXTENSIONS:
+        return None
+
+    # Relevance, as a tie breaker
+    cost = position * 0.1
+
+    # Format: JPEG and PNG decode reliably, the rest (or no extension) is a guess
+    if extension not in PREFERRED_EXTENSIONS:
+        cost += 0.5 if extension in ("", ".webp") else 2
+
+    # Dimensions: smaller than Kahoot's size looks blurry, much bigger takes longer to download
+    width, height = result.get("original_width"), result.get("original_height")
+    if width and height:
+        scale = min(config.IMAGE_MAX_WIDTH / width, config.IMAGE_MAX_HEIGHT / height)
+        cost += min(3, (scale - 1) * 2) if scale > 1 else min(2, math.log2(1 / scale) * 0.3)
+    else:
+        cost += 0.5
+
+    # Host: how fast its previous downloads were
+    cost += host_stats.expected_cost(urlparse(url).netloc)
+
+    return cost
+
+
+def rank_candidates(images_results: list) -> list:
+    """Returns the usable image results, best first."""
+    host_stats = get_host_stats()
+    costs = [(candidate_cost(result, i, host_stats), i) for i, result in enumerate(images_results)]
+    return [images_results[i] for cost, i in sorted(costs) if cost is not None]
+
+
+def download_image(url: str, cancelled: threading.Event = None, deadline: float = None) -> bytes:
+    """
+    Streams an image download, giving up on slow hosts and on files over the size ceiling
+    Args:
+        url (str): Image URL
+        cancelled (threading.Event): Stops the download when set (another download won)
+        deadline (float): time.monotonic() by which the whole download must be done
+    Returns:
+        bytes: Downloaded file
+    """
+    max_bytes = config.IMAGE_DOWNLOAD_MAX_MB * 1024 * 1024
+    read_timeout = config.IMAGE_READ_TIMEOUT if deadline is None else max(0.1, min(config.IMAGE_READ_TIMEOUT, deadline - time.monotonic()))
+
+    with get_http_session().get(url, stream=True, timeout=(config.IMAGE_CONNECT_TIMEOUT, read_timeout)) as response:
+        response.raise_for_status()
+
+        content_length = response.headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            raise ValueError(f"Image is too large ({int(content_length)} bytes).")
+
+        buffer = io.BytesIO()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            buffer.write(chunk)
+
+            if buffer.tell() > max_bytes:
+                raise ValueError(f"Image is larger than {config.IMAGE_DOWNLOAD_MAX_MB} MB.")
+            if cancelled is not None and cancelled.is_set():
+                raise DownloadCancelled()
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Download took over {config.IMAGE_DOWNLOAD_DEADLINE}s.")
+
+    return buffer.getvalue()
+
+
+def transcode_image(image_bytes: bytes) -> bytes:
+    """
+    Converts an image to a progressive JPEG at Kahoot's display resolution
+    Args:
+        image_bytes (bytes): Image in any format PIL can read
+    Returns:
+        bytes: JPEG no larger than the configured size cap (when possible)
+    """
+    from PIL import Image
+
+    max_size = (config.IMAGE_MAX_WIDTH, config.IMAGE_MAX_HEIGHT)
+
+    image = Image.open(io.BytesIO(image_bytes))
+
+    # JPEGs are decoded straight at a reduced scale, other formats are downscaled right after decoding
+    image.draft("RGB", max_size)
+    image.thumbnail(max_size)
+
+    # Flattening transparent images on white instead of letting the transparent areas turn black
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    else:
+        image = image.convert("RGB")
+
+    # Lowering the quality until the file fits the size cap
+    max_bytes = config.IMAGE_MAX_KB * 1024
+    for quality in (85, 75, 65, 50):
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+
+        if buffer.tell() <= max_bytes:
+            break
+
+    return buffer.getvalue()
+
+
+def race_downloads(urls: list, label: str, parallel: int, hedge_after: float):
+    """
+    Downloads and converts images, keeping the first one that decodes. The next candidate is
+    also started whenever the running ones are slow (a hedge) or one of them fails, until the deadline.
+    Args:
+        urls (list): Image URLs, best first
+        label (str): What they are, for the logs
+        parallel (int): Most downloads running at the same time
+        hedge_after (float): Seconds without a result before also starting the next candidate
+    Returns:
+        tuple: (JPEG bytes, index of the winning URL), or (None, None) if none worked before the deadline
+    """
+    if not urls:
+        return None, None
+
+    cancelled = threading.Event()
+    deadline = time.monotonic() + config.IMAGE_DOWNLOAD_DEADLINE
+    host_stats = get_host_stats()
+
+    def fetch(url: str) -> bytes:
+        start = time.perf_counter()
+        host = urlparse(url).netloc
+
+        try:
+            jpeg_bytes = transcode_image(download_image(url, cancelled, deadline))
+        except DownloadCancelled:
+            raise
+        except Exception:
+            host_stats.record(host, time.perf_counter() - start, success=False)
+            raise
+
+        host_stats.record(host, time.perf_counter() - start, success=True)
+        return jpeg_bytes
+
+    futures = {}
+    pending = set()
+
+    def start_next():
+        if len(futures) < len(urls):
+            future = get_download_executor().submit(fetch, urls[len(futures)])
+            futures[future] = len(futures)
+            pending.add(future)
+
+    start_next()
+    hedge_at = time.monotonic() + hedge_after
+
+    try:
+        while pending:
+            can_hedge = len(pending) < parallel and len(futures) < len(urls)
+            wake_at = min(deadline, hedge_at) if can_hedge else deadline
+
+            done, _ = wait(pending, timeout=max(0, wake_at - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                if time.monotonic() >= deadline:
+                    print(f"No {label} finished in {config.IMAGE_DOWNLOAD_DEADLINE}s")
+                    break
+
+                # Slow candidates keep running, the next one races them
+                start_next()
+                hedge_at = time.monotonic() + hedge_after
+                continue
+
+            for future in done:
+                pending.discard(future)
+                try:
+                    return future.result(), futures[future]
+                except Exception as e:
+                    print(f"Skipping {label} {futures[future] + 1}:", repr(e))
+                    if len(pending) < parallel:
+                        start_next()
+
+        return None, None
+
+    finally:
+        # The losing downloads stop at their next chunk, the ones still queued never start
+        cancelled.set()
+        for future in pending:
+            future.cancel()
+
+
+def get_image(query: str) -> str:
+    """
+    Finds an image for the query and converts it to JPEG
+    Args:
+        query (str): Google Images search keyword
+    Returns:
+        tuple: (path of a temporary JPEG file, which the caller deletes, whether the image came from the cache)
+    """
+    start = time.perf_counter()
+    image_cache = get_image_cache()
+
+    # Cache hits skip SerpAPI and the download entirely
+    jpeg_bytes = image_cache.get_image(query)
+    cache_hit = jpeg_bytes is not None
+
+    if jpeg_bytes is None:
+        images_results = image_cache.get_search(query)
+
+        if images_results is None:
+            params = {
+            "engine": "google_images",
+            "q": query,
+            "api_key": config.get_secret("SERPAPI_API_KEY")
+            }
+
+            results = serpapi_search(params)
+
+            # No results (or an error body) leaves no candidates, only actual results are cached
+            images_results = results.get("images_results") or []
+            if images_results:
+                image_cache.put_search(query, images_results)
+
+        # Racing the best ranked originals, then the thumbnails (small, on a fast CDN) if none of them worked
+        candidates = rank_candidates(images_results)
+        jpeg_bytes, winner = race_downloads([result["original"] for result in candidates], f"image for '{query}'", config.IMAGE_RACE_CANDIDATES, config.IMAGE_HEDGE_AFTER)
+
+        thumbnail = jpeg_bytes is None
+        if thumbnail:
+            thumbnails = [result["thumbnail"] for result in candidates if result.get("thumbnail")]
+            jpeg_bytes, winner = race_downloads(thumbnails, f"thumbnail for '{query}'", config.IMAGE_RACE_CANDIDATES, config.IMAGE_HEDGE_AFTER)
+
+        if jpeg_bytes is None:
+            raise ValueError(f"No usable image was found for '{query}'.")
+
+        image_cache.put_image(query, jpeg_bytes)
+
+    # Giving the browser its own copy so a cache eviction can't remove the file mid-upload
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
+        tmp.write(jpeg_bytes)
+        temp_path = tmp.name
+
+    if cache_hit:
+        metrics.record("image.fetch", time.perf_counter() - start, cache_hit=True)
+    else:
+        metrics.record("image.fetch", time.perf_counter() - start, cache_hit=False, candidate=winner, thumbnail=thumbnail)
+
+    return temp_path, cache_hit
+
+
+_host_stats = None
+_download_executor = None
+_lock = threading.Lock()
+
+
+def get_host_stats() -> HostStats:
+    """Returns the process-wide image host statistics."""
+    global _host_stats
+
+    with _lock:
+        if _host_stats is None:
+            _host_stats = HostStats()
+
+        return _host_stats
+
+
+def get_download_executor() -> ThreadPoolExecutor:
+    """Returns the process-wide pool of threads downloading the image candidates."""
+    global _download_executor
+
+    with _lock:
+        if _download_executor is None:
+            _download_executor = ThreadPoolExecutor(max_workers=config.IMAGE_DOWNLOAD_WORKERS, thread_name_prefix="image-download")
+
+        return _download_executor
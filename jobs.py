@@ -0,0 +1,187 @@
+# Background jobs, so long work like creating a Kahoot survives Streamlit reruns and page refreshes
+import queue
+import threading
+import time
+import traceback
+import uuid
+
+import config
+from admission import get_admission_controller
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is at its depth limit."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's function when the job is cancelled while running."""
+
+
+class Job:
+    """
+    A unit of work run by the JobManager. Its arguments (which can hold credentials)
+    are kept only in memory and dropped as soon as the job finishes.
+    """
+
+    def __init__(self, func, args: tuple, kwargs: dict):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"  # queued / running / done / failed / cancelled
+        self.progress = (0, 0)  # (completed steps, total steps)
+        self.result = None
+        self.error = None  # Formatted traceback if the job failed
+
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+        self.cancel_event = threading.Event()
+
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def set_progress(self, completed: int, total: int):
+        self.progress = (completed, total)
+
+    def check_cancelled(self):
+        """Raises JobCancelled if the job was cancelled, to be called between steps."""
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+
+class JobManager:
+    """
+    Bounded pool of worker threads fed by a bounded FIFO queue.
+
+    The function of every job is called as func(*args, job=job, **kwargs) so it can
+    report its progress and stop when the job is cancelled.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 10, retention: int = 3600):
+        self.workers = workers
+        self.retention = retention
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True).start()
+
+    def submit(self, func, *args, **kwargs) -> Job:
+        """Enqueues a job and returns it, or raises QueueFull if too many jobs are waiting."""
+        self._remove_expired()
+
+        job = Job(func, args, kwargs)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise QueueFull("Too many jobs are waiting, please try again in a few minutes.")
+
+        with self._lock:
+            self._jobs[job.id] = job
+
+        return job
+
+    def get(self, job_id: str):
+        """Returns the job with this id, or None if it doesn't exist (or expired)."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str):
+        """Cancels a queued job right away, or asks a running job to stop at its next step."""
+        job = self.get(job_id)
+        if job is None:
+            return
+
+        # Under the lock so a worker can't start the job between the check and the cancellation
+        with self._lock:
+            if job.finished:
+                return
+
+            job.cancel_event.set()
+            if job.status == "queued":
+                self._finish(job, "cancelled")
+
+                # Freeing its place in the queue right away (a worker may have just taken it, it then skips it)
+                with self._queue.mutex:
+                    try:
+                        self._queue.queue.remove(job)
+                    except ValueError:
+                        pass
+
+    def queue_position(self, job_id: str) -> int:
+        """Returns the 1-based position of a queued job, or 0 if it isn't waiting."""
+        with self._queue.mutex:
+            waiting = [job for job in self._queue.queue if job.status == "queued"]
+
+        for position, job in enumerate(waiting, start=1):
+            if job.id == job_id:
+                return position
+        return 0
+
+    def _finish(self, job: Job, status: str, result=None, error: str = None):
+        """Marks the job as finished, to be called with the lock held."""
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+
+        # Not keeping the arguments (credentials) around any longer than needed
+        job._args = job._kwargs = None
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+
+            # Starting the job under the lock, in the same step as checking it wasn't cancelled while queued
+            with self._lock:
+                if job.status != "queued":
+                    continue
+
+                job.status = "running"
+                job.started_at = time.time()
+                func, args, kwargs = job._func, job._args, job._kwargs
+
+            try:
+                result = func(*args, job=job, **kwargs)
+                status, result, error = "done", result, None
+            except JobCancelled:
+                status, result, error = "cancelled", None, None
+            except Exception:
+                status, result, error = "failed", None, traceback.format_exc()
+
+            with self._lock:
+                self._finish(job, status, result=result, error=error)
+
+    def _remove_expired(self):
+        now = time.time()
+
+        with self._lock:
+            for job_id, job in list(self._jobs.items()):
+                if job.finished and now - job.finished_at > self.retention:
+                    del self._jobs[job_id]
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Returns the process-wide job manager, created on first use from the config."""
+    global _job_manager
+
+    with _job_manager_lock:
+        if _job_manager is None:
+            # More workers than browsers would only wait for a browser outside the queue, without a position
+            _job_manager = JobManager(
+                workers=min(config.JOB_WORKERS, get_admission_controller().browsers),
+                max_queue=config.JOB_QUEUE_LIMIT,
+                retention=config.JOB_RETENTION,
+            )
+
+        return _job_manager
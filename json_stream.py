@@ -0,0 +1,77 @@
+# Incremental parsing of the quiz JSON while Gemini is still streaming it
+import json
+
+
+class QuestionStreamParser:
+    """
+    Yields every object of the top-level `questions` array as soon as it closes.
+
+    The text is fed chunk by chunk. Anything outside the JSON document (like a
+    leading ```json fence) is ignored, and strings are tracked so braces and
+    brackets inside them don't count.
+    """
+
+    def __init__(self, array_key: str = "questions"):
+        self.array_key = array_key
+
+        self._buffer = ""
+        self._position = 0  # Next character of the buffer to scan
+        self._stack = []  # Open containers: "{" or "["
+        self._in_string = False
+        self._escaped = False
+        self._string_start = None
+        self._last_key = None  # Last string closed directly inside the top-level object
+        self._array_depth = None  # Stack depth of the questions array once it's opened
+        self._object_start = None  # Buffer index where the current question object starts
+
+    def feed(self, text: str) -> list:
+        """
+        Adds a chunk of the response
+        Args:
+            text (str): Next chunk of the model output
+        Returns:
+            list: Questions completed by this chunk (dicts)
+        """
+        self._buffer += text
+        completed = []
+
+        while self._position < len(self._buffer):
+            i = self._position
+            char = self._buffer[i]
+            self._position += 1
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_key = self._buffer[self._string_start + 1:i]
+                continue
+
+            if char == '"' and self._stack:
+                self._in_string = True
+                self._string_start = i
+
+            elif char in "{[":
+                if char == "{" and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._object_start = i
+
+                self._stack.append(char)
+
+                if char == "[" and len(self._stack) == 2 and self._last_key == self.array_key:
+                    self._array_depth = 2
+
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+
+                if char == "}" and self._object_start is not None and len(self._stack) == self._array_depth:
+                    completed.append(json.loads(self._buffer[self._object_start:i + 1]))
+                    self._object_start = None
+
+                elif char == "]" and self._array_depth is not None and len(self._stack) == self._array_depth - 1:
+                    self._array_depth = None  # The questions array is closed
+
+        return completed
@@ -0,0 +1,644 @@
+# Creating the Kahoot in a headless browser, independent of the Streamlit UI
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import ElementClickInterceptedException
+from selenium.common.exceptions import WebDriverException
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+import config
+import metrics
+from driver_pool import get_driver_pool
+from images import get_image
+from kahoot_xlsx import export_quiz_xlsx
+from webdriver_trace import WebDriverTracer, traced
+
+
+LOGIN_ERROR_SELECTOR = "span.error-message__ErrorMessageComponent-sc-sut6rh-0"
+CREATE_BUTTON_SELECTOR = "button[data-functional-selector='top-bar__create']"
+QUESTION_TITLE_SELECTOR = "div[data-functional-selector='question-title__input'][contenteditable='true']"
+QUESTION_LIST_ITEM_SELECTOR = "[data-functional-selector='question-list__item-{}']"
+QUESTION_IMAGE_SELECTOR = "img[data-functional-selector='media-details__media-image']"
+SUMMARY_BUTTON_SELECTOR = "button[data-functional-selector='top-bar__kahoot-summary-button']"
+
+# Spreadsheet import, from the add question dialog
+IMPORT_SPREADSHEET_BUTTON_SELECTOR = "button[data-functional-selector='create-button__import-spreadsheet']"
+IMPORT_FILE_INPUT_SELECTOR = "input[data-functional-selector='import-spreadsheet__file-input']"
+IMPORT_CONFIRM_BUTTON_SELECTOR = "button[data-functional-selector='import-spreadsheet__add-questions-button']"
+
+# Fills the title, the choices and the correct answer of the current question in one WebDriver call.
+# Arguments: title, choices (empty for true or false), answer index, timeout (ms), and the async callback.
+# The text goes through document.execCommand("insertText"), which fires the same beforeinput/input
+# events as typing, so the editor's React state sees it. Nothing is changed unless every element is
+# found, and the text is cleared again if the editor doesn't keep it, so the per-element fallback
+# always starts from an empty question.
+FAST_FILL_SCRIPT = """
+const [title, choices, answerIndex, timeout, done] = arguments;
+const deadline = Date.now() + timeout;
+
+function editableIn(box) {
+    if (!box) return null;
+    return box.isContentEditable ? box : box.querySelector("[contenteditable='true']");
+}
+
+function findElements() {
+    const titleBox = document.querySelector("%s");
+    const choiceBoxes = choices.map((_, i) => editableIn(document.getElementById(`question-choice-${i}`)));
+    const toggle = document.querySelector(`button[data-functional-selector="question-answer__toggle-button"][aria-label="Toggle answer ${answerIndex + 1} correct."]`);
+
+    if (!titleBox || !toggle || choiceBoxes.some(box => !box)) return null;
+    return {titleBox, choiceBoxes, toggle};
+}
+
+function normalize(text) {
+    return (text || "").replace(/\\s+/g, " ").trim();
+}
+
+function setText(box, text) {
+    box.focus();
+    window.getSelection().selectAllChildren(box);
+
+    const inserted = text ? document.execCommand("insertText", false, text) : document.execCommand("delete");
+    if (!inserted) {
+        box.textContent = text;
+        box.dispatchEvent(new InputEvent("input", {bubbles: true, inputType: "insertText", data: text}));
+    }
+}
+
+function fill(elements) {
+    const boxes = [elements.titleBox, ...elements.choiceBoxes];
+    const texts = [title, ...choices];
+    boxes.forEach((box, i) => setText(box, texts[i]));
+    boxes[boxes.length - 1].blur();
+
+    // Checking after the editor re-rendered that it kept the text
+    setTimeout(() => {
+        const mismatch = boxes.findIndex((box, i) => !box.isConnected || normalize(box.textContent) !== normalize(texts[i]));
+        if (mismatch !== -1) {
+            boxes.filter(box => box.isConnected).forEach(box => setText(box, ""));
+            done({ok: false, reason: `the editor didn't keep the text of field ${mismatch}`});
+            return;
+        }
+
+        // Already marked when refilling a question a failed attempt left partly filled
+        if (elements.toggle.getAttribute("aria-pressed") !== "true") elements.toggle.click();
+        done({ok: true});
+    }, 50);
+}
+
+(function poll() {
+    const elements = findElements();
+    if (elements) fill(elements);
+    else if (Date.now() > deadline) done({ok: false, reason: "question elements not found"});
+    else setTimeout(poll, 50);
+})();
+""" % QUESTION_TITLE_SELECTOR
+
+
+@traced
+def wait_for_any(driver, conditions: dict, timeout=15):
+    """
+    Polls several expected conditions in a single loop and returns the first one met
+    Args:
+        driver (WebDriver): Browser
+        conditions (dict): Name -> expected condition (e.g. EC.presence_of_element_located(...))
+        timeout (float): Seconds before giving up
+    Returns:
+        tuple: (name, value) of the first condition met
+    """
+    deadline = time.monotonic() + timeout
+
+    while True:
+        for name, condition in conditions.items():
+            try:
+                value = condition(driver)
+            except (NoSuchElementException, StaleElementReferenceException):
+                value = False
+
+            if value:
+                return name, value
+
+        if time.monotonic() > deadline:
+            raise TimeoutException(f"None of {list(conditions)} happened in {timeout} seconds.")
+
+        time.sleep(config.WAIT_POLL_INTERVAL)
+
+
+@traced
+def dismiss_overlays(driver) -> bool:
+    """Closes the cookie banner or the subscription popup if one is showing, without waiting."""
+    cookie_buttons = driver.find_elements(By.ID, "onetrust-reject-all-handler")
+    if cookie_buttons and cookie_buttons[0].is_displayed():
+        cookie_buttons[0].click()
+        return True
+
+    if driver.find_elements(By.NAME, "ipm-frame"):
+        driver.refresh()
+        return True
+
+    return False
+
+
+@traced
+def wait_and_click(driver, by, locator, timeout=15):
+    """Wait until element is clickable and then click it."""
+    element = WebDriverWait(driver, timeout, poll_frequency=config.WAIT_POLL_INTERVAL).until(
+        EC.element_to_be_clickable((by, locator))
+    )
+
+    element.click()
+
+    return element
+
+
+@traced
+def wait_and_send_keys(driver, by, locator, text, timeout=15, clear=False):
+    """Wait until element is present and send keys (replacing its value if clear is set)."""
+    element = WebDriverWait(driver, timeout, poll_frequency=config.WAIT_POLL_INTERVAL).until(
+        EC.presence_of_element_located((by, locator))
+    )
+    if clear:
+        element.clear()
+    element.send_keys(text)
+    return element
+
+
+@traced
+def safe_wait_and_click(driver, by, locator, timeout=15, retries=3):
+    """Click with retry if element gets stale."""
+    for attempt in range(retries):
+        try:
+            # Retrying right away, the wait itself polls until the re-rendered element is clickable
+            element = WebDriverWait(driver, timeout, poll_frequency=config.WAIT_POLL_INTERVAL).until(
+                EC.element_to_be_clickable((by, locator))
+            )
+            element.click()
+            return element
+        except StaleElementReferenceException:
+            if attempt == retries - 1:
+                raise
+
+
+@traced
+def fast_fill_question(driver, question: dict, timeout=15) -> bool:
+    """
+    Fills the current question's title, choices and correct answer with one injected script
+    Args:
+        driver: WebDriver in the question editor
+        question (dict): Question from the quiz data
+        timeout (int): Seconds to wait for the question's elements
+    Returns:
+        bool: True if filled, False if the per-element path has to be used instead
+    """
+    choices = question["choices"] if question["type"].lower() == "multiple_choice" else []
+
+    try:
+        driver.set_script_timeout(timeout + 5)
+        result = driver.execute_async_script(FAST_FILL_SCRIPT, question["question"], choices, question["answer"], timeout * 1000)
+    except WebDriverException as e:
+        print("Fast fill failed, filling the question field by field:", e.msg)
+        return False
+
+    if not result or not result.get("ok"):
+        print("Fast fill failed, filling the question field by field:", (result or {}).get("reason"))
+        return False
+
+    return True
+
+
+@traced
+def import_questions(driver, quiz_data: dict, timeout=120):
+    """
+    Adds all the questions at once by importing them from a spreadsheet in Kahoot's template format
+    Args:
+        driver: WebDriver in the question editor
+        quiz_data (dict): Quiz data
+        timeout (int): Seconds to wait for the imported questions
+    """
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
+        tmp.write(export_quiz_xlsx(quiz_data))
+        xlsx_path = tmp.name
+
+    try:
+        wait_and_click(driver, By.CSS_SELECTOR, "button[data-functional-selector='add-question-button']")
+        safe_wait_and_click(driver, By.CSS_SELECTOR, IMPORT_SPREADSHEET_BUTTON_SELECTOR)
+
+        wait_and_send_keys(driver, By.CSS_SELECTOR, IMPORT_FILE_INPUT_SELECTOR, xlsx_path)
+        wait_and_click(driver, By.CSS_SELECTOR, IMPORT_CONFIRM_BUTTON_SELECTOR, timeout=timeout)
+
+        # Waiting for the last question to show in the question list
+        WebDriverWait(driver, timeout, poll_frequency=config.WAIT_POLL_INTERVAL).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, QUESTION_LIST_ITEM_SELECTOR.format(len(quiz_data["questions"]) - 1)))
+        )
+    finally:
+        os.remove(xlsx_path)
+
+
+@traced
+def add_question(driver, question_type: str):
+    """Adds an empty question of the given type after the current one."""
+    wait_and_click(driver, By.CSS_SELECTOR, "button[data-functional-selector='add-question-button']")
+
+    WebDriverWait(driver, 15, poll_frequency=config.WAIT_POLL_INTERVAL).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "section.create-block__Section-sc-1rs5jsh-2"))
+    )
+
+    if question_type.lower() == "multiple_choice":
+        safe_wait_and_click(driver, By.CSS_SELECTOR, "button[data-functional-selector='create-button__quiz']")
+
+    elif question_type.lower() == "true_or_false":
+        safe_wait_and_click(driver, By.CSS_SELECTOR, "button[data-functional-selector='create-button__true-false']")
+
+
+@traced
+def fill_question_fields(driver, question: dict, replace=False):
+    """
+    Fills the current question's title, choices and correct answer element by element
+    Args:
+        driver: WebDriver in the question editor
+        question (dict): Question from the quiz data
+        replace (bool): Replaces the text already in the fields instead of typing after it (for a partly filled question)
+    """
+    # Question
+    question_box = wait_and_click(driver, By.CSS_SELECTOR, QUESTION_TITLE_SELECTOR)
+    if replace:
+        question_box.send_keys(Keys.CONTROL, "a")
+    question_box.send_keys(question["question"])
+
+    # Choices
+    if question["type"].lower() == "multiple_choice":
+        for choice, id_idx in zip(question["choices"], range(0, len(question["choices"]))):
+            # Entering the answer
+            editable_div = wait_and_click(driver, By.ID, f"question-choice-{id_idx}")
+            if replace:
+                editable_div.send_keys(Keys.CONTROL, "a")
+            editable_div.send_keys(choice)
+
+    # Answer (clicking it again would unmark it)
+    answer_toggle_selector = f'button[data-functional-selector="question-answer__toggle-button"][aria-label="Toggle answer {question["answer"] + 1} correct."]'
+    if replace and driver.find_element(By.CSS_SELECTOR, answer_toggle_selector).get_attribute("aria-pressed") == "true":
+        return
+    wait_and_click(driver, By.CSS_SELECTOR, answer_toggle_selector)
+
+
+class PublishCheckpoint:
+    """
+    How far publishing a Kahoot got, so an attempt that fails resumes the same draft instead of starting over.
+
+    `questions_done` counts the completed questions in the "editor" mode and the questions
+    with their image attached in the "import" mode. Each step has its own retry budget.
+    """
+
+    def __init__(self, publish_mode: str):
+        self.publish_mode = publish_mode
+        self.draft_url = None
+        self.metadata_done = False
+        self.imported = False
+        self.questions_done = 0
+
+        self._failures = {}  # Step -> failed attempts at it
+
+    def step(self) -> str:
+        """Returns the step the next attempt starts at."""
+        if self.draft_url is None:
+            return "open_editor"
+        if not self.metadata_done:
+            return "metadata"
+        if self.publish_mode == "import" and not self.imported:
+            return "import"
+        return f"question_{self.questions_done}"
+
+    def record_failure(self) -> bool:
+        """Counts a failed attempt at the current step, returns False once the step's retry budget is spent."""
+        step = self.step()
+        self._failures[step] = self._failures.get(step, 0) + 1
+        return self._failures[step] <= config.KAHOOT_QUESTION_RETRIES
+
+
+def create_kahoot_quiz(quiz_data: dict, kahoot_email: str, kahoot_password: str, job=None):
+    """
+    Creates the Kahoot in a headless browser, resuming the draft if an attempt fails partway
+    Args:
+        quiz_data (dict): Quiz data with the title and description added
+        kahoot_email (str): Kahoot email or username
+        kahoot_password (str): Kahoot password
+        job (jobs.Job): Background job to report the progress to and to check for cancellation
+    Returns:
+        tuple: (True, Kahoot link) or (False, error message)
+    """
+
+    publish_mode = config.KAHOOT_PUBLISH_MODE
+    stopwatch = metrics.Stopwatch(run_id=metrics.new_run_id(), publish_mode=publish_mode)
+    checkpoint = PublishCheckpoint(publish_mode)
+    questions = quiz_data["questions"]
+
+    # Step 1: Prefetching all the images in the background so the downloads overlap with the browser startup and login
+    image_queries = [quiz_data["cover_image"]] + [question["image"] for question in questions if question.get("image")]
+    image_executor = ThreadPoolExecutor(max_workers=config.IMAGE_PREFETCH_WORKERS, thread_name_prefix="image-prefetch")
+
+    image_futures = {}
+    for query in image_queries:
+        if query and query not in image_futures:
+            image_futures[query] = image_executor.submit(get_image, query)
+
+    # The pending downloads keep running, no new ones can be submitted
+    image_executor.shutdown(wait=False)
+
+    def remove_image(future):
+        """Deletes a prefetched image's temporary file once its download is done."""
+        if not future.cancelled() and future.exception() is None:
+            try:
+                os.remove(future.result()[0])
+            except OSError:
+                pass
+
+    def wait_for_image(query: str) -> str:
+        """Returns the prefetched image's path (None if no image could be found), recording how long the browser had to wait for it."""
+        if query not in image_futures:
+            return None
+
+        with metrics.span("kahoot.image_wait", **stopwatch.attributes):
+            try:
+                return image_futures[query].result()[0]
+            except Exception as e:
+                # A missing image isn't worth failing the whole Kahoot, it's published without it
+                print(f"No image for '{query}', publishing without it:", e)
+                return None
+
+    @traced
+    def upload_question_image(driver, i: int, query: str):
+        """Uploads the image of the question open in the editor, if one was found."""
+        image_path = wait_for_image(query)
+        if image_path is None:
+            return
+
+        wait_and_click(driver, By.CLASS_NAME, "MUmzd") # Clicking the upload file button
+        wait_and_send_keys(driver, By.CSS_SELECTOR, "[data-functional-selector='media-upload-dialog__upload-media-input']", image_path)
+
+        # Waiting for the image to load
+        with metrics.span("kahoot.image_upload", **stopwatch.attributes, index=i):
+            WebDriverWait(driver, 50, poll_frequency=config.WAIT_POLL_INTERVAL).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, QUESTION_IMAGE_SELECTOR))
+            )
+
+    def publish(driver):
+        """One attempt at steps 3 to 6, starting from the checkpoint and updating it as it goes."""
+
+        # Step 3: Navigating to Kahoot Login Page and Logging In
+        driver.get(f"{config.KAHOOT_BASE_URL}/auth/login")
+
+        # Reject cookies if popup appears (racing it against the login form instead of always waiting for it)
+        first_shown, _ = wait_for_any(driver, {
+            "cookie_banner": EC.element_to_be_clickable((By.ID, "onetrust-reject-all-handler")),
+            "login_form": EC.presence_of_element_located((By.ID, "username")),
+        })
+        if first_shown == "cookie_banner":
+            wait_and_click(driver, By.ID, "onetrust-reject-all-handler")
+
+        # Fill login form
+        wait_and_send_keys(driver, By.ID, "username", kahoot_email)
+        wait_and_send_keys(driver, By.ID, "password", kahoot_password)
+
+        try:
+            wait_and_click(driver, By.ID, "login-submit-btn")
+        except ElementClickInterceptedException:
+            # The cookie banner showed up after the login form
+            dismiss_overlays(driver)
+            wait_and_click(driver, By.ID, "login-submit-btn")
+
+        # Waiting for whichever happens first: a login error, the subscription popup or the editor being ready
+        outcome, _ = wait_for_any(driver, {
+            "login_error": EC.presence_of_element_located((By.CSS_SELECTOR, LOGIN_ERROR_SELECTOR)),
+            "subscription_popup": EC.presence_of_element_located((By.NAME, "ipm-frame")),
+            "create_button": EC.element_to_be_clickable((By.CSS_SELECTOR, CREATE_BUTTON_SELECTOR)),
+        }, timeout=30)
+
+        stopwatch.lap("kahoot.login", outcome=outcome)
+
+        if outcome == "login_error":
+            stopwatch.total("kahoot.create", success=False)
+            return False, "Invalid username, email, or password."
+
+
+        # Step 4: Creating a New Kahoot, or reopening the draft of the failed attempt
+        if job:
+            job.check_cancelled()
+
+        # Handle subscription popup if exists
+        if outcome == "subscription_popup":
+            driver.refresh()
+
+        resuming = checkpoint.draft_url is not None
+
+        if resuming:
+            driver.get(checkpoint.draft_url)
+        else:
+            # Clicking the Create Button (the popup can still show up after the button is ready)
+            try:
+                wait_and_click(driver, By.CSS_SELECTOR, CREATE_BUTTON_SELECTOR)
+            except ElementClickInterceptedException:
+                dismiss_overlays(driver)
+                wait_and_click(driver, By.CSS_SELECTOR, CREATE_BUTTON_SELECTOR)
+
+            # Clicking the Kahoot option
+            wait_and_click(driver, By.CSS_SELECTOR, "button[data-functional-selector='top-bar__create-kahoot']")
+
+            # Clicking the Blank Canvas option
+            wait_and_click(driver, By.XPATH, "//div[text()='Blank canvas']/ancestor::button")
+
+        # Waiting for the editor, the editor's URL is the draft's
+        WebDriverWait(driver, 30, poll_frequency=config.WAIT_POLL_INTERVAL).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, SUMMARY_BUTTON_SELECTOR))
+        )
+        checkpoint.draft_url = driver.current_url
+
+        # A reopened draft also needs its question list, to find where the failed attempt stopped
+        if resuming:
+            WebDriverWait(driver, 30, poll_frequency=config.WAIT_POLL_INTERVAL).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, QUESTION_LIST_ITEM_SELECTOR.format(0)))
+            )
+
+        stopwatch.lap("kahoot.open_editor", resumed=resuming)
+
+
+        # Step 5: Filling in the Kahoot Quiz Data
+
+        # Step 5.1: Entering the title, description and cover page (metadata)
+        if not checkpoint.metadata_done:
+            # Entering to the settings
+            wait_and_click(driver, By.CSS_SELECTOR, SUMMARY_BUTTON_SELECTOR)
+
+            # Entering the title and the description (replacing what a failed attempt typed)
+            wait_and_send_keys(driver, By.ID, "kahoot-title", quiz_data["title"], clear=resuming)
+            wait_and_send_keys(driver, By.ID, "description", quiz_data["description"], clear=resuming)
+
+            # Entering the cover page (the Kahoot keeps the default one if no image was found)
+            cover_path = wait_for_image(quiz_data["cover_image"])
+            if cover_path is not None:
+                wait_and_click(driver, By.CSS_SELECTOR, "button[data-functional-selector='dialog-information-kahoot__image_library_btn']") # Add Button
+                wait_and_click(driver, By.CSS_SELECTOR, "button[data-functional-selector='open-upload-media-dialog-button']") # Upload Media Button
+
+                wait_and_send_keys(driver, By.CSS_SELECTOR, "[data-functional-selector='media-upload-dialog__upload-media-input']", cover_path)
+
+                # Waiting for the image to load
+                with metrics.span("kahoot.image_upload", **stopwatch.attributes, cover=True):
+                    WebDriverWait(driver, 50, poll_frequency=config.WAIT_POLL_INTERVAL).until(
+                        EC.presence_of_element_located(
+                            (By.ID, "cover-image")
+                        )
+                    )
+
+            # Clicking the Done Button to Submit
+            wait_and_click(driver, By.CSS_SELECTOR, "button[data-functional-selector='dialog-information-kahoot__done-button']")
+            checkpoint.metadata_done = True
+            stopwatch.lap("kahoot.metadata")
+
+
+        # Step 5.2: Entering the questions, choices, answers and images.
+        # The first question of a resumed attempt can already hold part of its content.
+        first = checkpoint.questions_done
+
+        if publish_mode == "import":
+            # Importing every question in one step, then attaching the images to the questions that have one
+            if not checkpoint.imported:
+                # The failed attempt may have timed out after the import went through
+                already_imported = resuming and len(questions) > 1 and driver.find_elements(By.CSS_SELECTOR, QUESTION_LIST_ITEM_SELECTOR.format(len(questions) - 1))
+                if not already_imported:
+                    import_questions(driver, quiz_data)
+
+                checkpoint.imported = True
+                stopwatch.lap("kahoot.import", questions=len(questions))
+
+            image_questions = [i for i, question in enumerate(questions) if question.get("image")]
+            questions_without_image = len(questions) - len(image_questions)
+
+            for position in range(first, len(image_questions)):
+                if job:
+                    job.set_progress(questions_without_image + position, len(questions))
+                    job.check_cancelled()
+
+                i = image_questions[position]
+                wait_and_click(driver, By.CSS_SELECTOR, QUESTION_LIST_ITEM_SELECTOR.format(i))
+
+                if not (resuming and position == first and driver.find_elements(By.CSS_SELECTOR, QUESTION_IMAGE_SELECTOR)):
+                    upload_question_image(driver, i, questions[i]["image"])
+
+                checkpoint.questions_done = position + 1
+                stopwatch.lap("kahoot.question", index=i, type=questions[i]["type"].lower(), has_image=True)
+
+            if job:
+                job.set_progress(len(questions), len(questions))
+
+        else:
+            # Selecting the question to resume at, or adding it if the failed attempt didn't get to it
+            if resuming and first < len(questions):
+                if driver.find_elements(By.CSS_SELECTOR, QUESTION_LIST_ITEM_SELECTOR.format(first)):
+                    wait_and_click(driver, By.CSS_SELECTOR, QUESTION_LIST_ITEM_SELECTOR.format(first))
+                else:
+                    add_question(driver, questions[first]["type"])
+
+            for i in range(first, len(questions)):
+                question = questions[i]
+                refill = resuming and i == first
+
+                if job:
+                    job.check_cancelled()
+
+                # Image
+                if question.get("image") and not (refill and driver.find_elements(By.CSS_SELECTOR, QUESTION_IMAGE_SELECTOR)):
+                    upload_question_image(driver, i, question["image"])
+
+                # Question, choices and answer in one script call, or element by element if that fails
+                fast_filled = config.KAHOOT_FAST_FILL and fast_fill_question(driver, question)
+
+                if not fast_filled:
+                    fill_question_fields(driver, question, replace=refill)
+
+                checkpoint.questions_done = i + 1
+
+                if job:
+                    job.set_progress(i + 1, len(questions))
+
+                # Add Question Button, choosing the new question's type based on the type of the next question
+                if i < len(questions) - 1:
+                    add_question(driver, questions[i + 1]["type"])
+
+                stopwatch.lap("kahoot.question", index=i, type=question["type"].lower(), has_image=bool(question.get("image")), fast_fill=bool(fast_filled))
+
+
+        # Step 6: Saving the Kahoot
+        if job:
+            job.check_cancelled()
+
+        # Clicking Save
+        wait_and_click(driver, By.CSS_SELECTOR, "button[data-functional-selector='top-bar__save-button']")
+
+        # Taking the Kahoot share link
+        wait_and_click(driver, By.CSS_SELECTOR, "button[data-functional-selector='dialog-complete-kahoot__share_kahoot']") # Clicking Share
+        link_elem = driver.find_element(By.ID, "share-kahoot-link")
+
+        # Geting the "value" attribute (contains the link)
+        kahoot_link = link_elem.get_attribute("value")
+        print(kahoot_link)
+
+        # Clicking Close
+        wait_and_click(driver, By.CLASS_NAME, 'styles__1g5agrwi')
+
+        # Clicking Done
+        wait_and_click(driver, By.CSS_SELECTOR, "button[data-functional-selector='dialog-complete-kahoot__finish-button']")
+
+        stopwatch.lap("kahoot.save")
+
+        # This Kahoot's images served by the image cache, every prefetch being done by now
+        fetched = [future.result()[1] for future in image_futures.values() if future.done() and not future.cancelled() and future.exception() is None]
+
+        stopwatch.total(
+            "kahoot.create",
+            success=True,
+            questions=len(questions),
+            images=sum(1 for question in questions if question.get("image")),
+            image_cache_hits=sum(fetched),
+            image_cache_misses=len(fetched) - sum(fetched),
+        )
+
+        return True, kahoot_link
+
+
+    # Tracing the WebDriver commands and waits of every attempt if enabled (written when the creation ends)
+    tracer = WebDriverTracer(stopwatch) if config.KAHOOT_TRACE else None
+
+    # Step 2: Taking a warm browser from the pool for each attempt (released or torn down on every exit path).
+    # A browser that failed is torn down, the next attempt logs in with a new one and reopens the draft.
+    try:
+        while True:
+            try:
+                with get_driver_pool().session() as driver, (tracer.tracing(driver) if tracer else nullcontext()):
+                    stopwatch.lap("kahoot.driver_start")
+                    return publish(driver)
+
+            except WebDriverException as e:
+                step = checkpoint.step()
+                stopwatch.lap("kahoot.retry", step=step, error=type(e).__name__)
+
+                if not checkpoint.record_failure():
+                    stopwatch.total("kahoot.create", success=False, step=step)
+                    raise
+
+                print(f"Publishing failed at {step}, retrying from there:", e.msg)
+
+    finally:
+        # Deleting the prefetched images, the ones still downloading (a cancelled or failed job) when they finish
+        for future in image_futures.values():
+            future.cancel()
+            future.add_done_callback(remove_image)
+
+        if tracer:
+            tracer.write()
@@ -0,0 +1,101 @@
+# Writing quiz data to Kahoot's spreadsheet import template, so the editor imports every question in one step
+import io
+
+import config
+
+
+# Layout of Kahoot's "Quiz template" spreadsheet: a few rows of instructions, the column
+# headers, then one question per row (the first column only numbers the rows)
+HEADER_ROW = 8
+FIRST_QUESTION_ROW = 9
+HEADERS = [
+    "",
+    "Question - max 120 characters",
+    "Answer 1 - max 75 characters",
+    "Answer 2 - max 75 characters",
+    "Answer 3 - max 75 characters",
+    "Answer 4 - max 75 characters",
+    "Time limit (sec) – 5, 10, 20, 30, 60, 90, 120, or 240 secs",
+    "Correct answer(s) - choose at least one",
+]
+
+MAX_QUESTION_CHARS = 120
+MAX_ANSWER_CHARS = 75
+TIME_LIMITS = (5, 10, 20, 30, 60, 90, 120, 240)
+
+
+def _fit(text: str, max_chars: int) -> str:
+    """Shortens a text to the template's limit, the import rejects longer cells."""
+    text = " ".join(str(text).split())
+    return text if len(text) <= max_chars else text[:max_chars - 1].rstrip() + "…"
+
+
+def _time_limit(question: dict) -> int:
+    """Returns the question's time limit, rounded up to one the template allows."""
+    seconds = question.get("time_limit") or config.KAHOOT_TIME_LIMIT
+    return next((limit for limit in TIME_LIMITS if limit >= seconds), TIME_LIMITS[-1])
+
+
+def export_quiz_xlsx(quiz_data: dict) -> bytes:
+    """
+    Writes the questions in Kahoot's spreadsheet import format
+    Args:
+        quiz_data (dict): Quiz data
+    Returns:
+        bytes: XLSX file
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Sheet1"
+
+    sheet.cell(row=1, column=2, value="Quiz template")
+    sheet.cell(row=2, column=2, value="Add questions, at least two answer alternatives, time limit and choose correct answers (at least one). Have fun creating your awesome quiz!")
+    sheet.cell(row=3, column=2, value="Remember: questions have a limit of 120 characters and answers can have 75 characters max. Text will turn red in Excel or Google Docs if you exceed this limit. If several answers are correct, separate them with a comma.")
+
+    for column, header in enumerate(HEADERS, start=1):
+        sheet.cell(row=HEADER_ROW, column=column, value=header)
+
+    for i, question in enumerate(quiz_data["questions"]):
+        row = FIRST_QUESTION_ROW + i
+        choices = question["choices"][:4]
+
+        sheet.cell(row=row, column=1, value=i + 1)
+        sheet.cell(row=row, column=2, value=_fit(question["question"], MAX_QUESTION_CHARS))
+        for j, choice in enumerate(choices):
+            sheet.cell(row=row, column=3 + j, value=_fit(choice, MAX_ANSWER_CHARS))
+        sheet.cell(row=row, column=7, value=_time_limit(question))
+        sheet.cell(row=row, column=8, value=str(question["answer"] + 1))
+
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def read_quiz_xlsx(xlsx_bytes: bytes) -> list:
+    """
+    Reads the questions back from a spreadsheet in the import format
+    Args:
+        xlsx_bytes (bytes): XLSX file
+    Returns:
+        list: Questions with "question", "choices", "time_limit" and "answers" (0-based indexes)
+    """
+    from openpyxl import load_workbook
+
+    sheet = load_workbook(io.BytesIO(xlsx_bytes), read_only=True).worksheets[0]
+
+    questions = []
+    for row in sheet.iter_rows(min_row=FIRST_QUESTION_ROW, max_col=len(HEADERS), values_only=True):
+        if not row[1]:
+            continue
+
+        correct_answers = str(row[7] or "").replace(" ", "")
+        questions.append({
+            "question": str(row[1]),
+            "choices": [str(choice) for choice in row[2:6] if choice not in (None, "")],
+            "time_limit": int(row[6] or config.KAHOOT_TIME_LIMIT),
+            "answers": [int(answer) - 1 for answer in correct_answers.split(",") if answer],
+        })
+
+    return questions
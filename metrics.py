@@ -0,0 +1,128 @@
+# Timing spans for every stage of generating and creating a Kahoot, appended to a local JSON Lines file
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import config
+
+
+_write_lock = threading.Lock()
+
+
+def new_run_id() -> str:
+    """Returns an id grouping the spans of one generation or one Kahoot creation."""
+    return uuid.uuid4().hex[:12]
+
+
+def record(name: str, duration: float, **attributes):
+    """
+    Appends one timing span to the metrics file
+    Args:
+        name (str): Stage name, like "kahoot.login"
+        duration (float): Seconds the stage took
+        attributes: Extra JSON-serializable fields (run_id, question index, model...)
+    """
+    event = {"name": name, "duration": round(duration, 4), "time": round(time.time(), 3), **attributes}
+
+    try:
+        with _write_lock:
+            os.makedirs(os.path.dirname(config.METRICS_FILE), exist_ok=True)
+            with open(config.METRICS_FILE, "a", encoding="utf-8") as file:
+                file.write(json.dumps(event, ensure_ascii=False) + "\n")
+                size = file.tell()
+
+            # Rotating the file so it can't grow forever, the previous one stays readable until the next rotation
+            if size > config.METRICS_MAX_MB * 1024 * 1024:
+                os.replace(config.METRICS_FILE, config.METRICS_FILE + ".1")
+    except OSError as e:
+        # Metrics must never break the app
+        print("Couldn't write metrics:", e)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Times the block and records it, even if it raises. The yielded dict can be
+    updated inside the block to add attributes known only at the end (e.g. the model).
+    """
+    start = time.perf_counter()
+    try:
+        yield attributes
+    except BaseException as e:
+        attributes["error"] = type(e).__name__
+        raise
+    finally:
+        record(name, time.perf_counter() - start, **attributes)
+
+
+class Stopwatch:
+    """Records consecutive stages of a flow, each one lasting from the previous lap to the current one."""
+
+    def __init__(self, **attributes):
+        self.attributes = attributes
+        self.started_at = time.perf_counter()
+        self._last_lap = self.started_at
+        self.on_lap = None  # If set, on_lap(name, duration, attributes) is called after each lap (used by the WebDriver tracer)
+
+    def lap(self, name: str, **attributes) -> float:
+        now = time.perf_counter()
+        duration = now - self._last_lap
+        self._last_lap = now
+
+        record(name, duration, **self.attributes, **attributes)
+        if self.on_lap is not None:
+            self.on_lap(name, duration, attributes)
+        return duration
+
+    def total(self, name: str, **attributes) -> float:
+        """Records the time since the stopwatch started."""
+        duration = time.perf_counter() - self.started_at
+        record(name, duration, **self.attributes, **attributes)
+        return duration
+
+
+def _tail_lines(path: str, max_lines: int) -> list:
+    """Returns the last lines of a file, reading it backwards by blocks instead of loading all of it."""
+    if max_lines <= 0:
+        return []
+
+    try:
+        with open(path, "rb") as file:
+            position = file.seek(0, os.SEEK_END)
+            data = b""
+
+            while position > 0 and data.count(b"\n") <= max_lines:
+                block_size = min(64 * 1024, position)
+                position -= block_size
+                file.seek(position)
+                data = file.read(block_size) + data
+    except FileNotFoundError:
+        return []
+
+    lines = data.split(b"\n")
+    if position > 0:
+        lines = lines[1:]  # Cut by the block boundary
+
+    lines = [line for line in lines if line.strip()]
+    return [line.decode("utf-8", errors="replace") for line in lines[-max_lines:]]
+
+
+def read_events(names: set = None, max_events: int = 20000) -> list:
+    """Returns the most recent recorded spans (from the end of the file and the rotated one), optionally only the ones with the given names."""
+    lines = _tail_lines(config.METRICS_FILE, max_events)
+    lines = _tail_lines(config.METRICS_FILE + ".1", max_events - len(lines)) + lines
+
+    events = []
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue  # Partially written line
+
+        if names is None or event["name"] in names:
+            events.append(event)
+
+    return events
@@ -0,0 +1,245 @@
+# Extracting the text of source PDFs locally and keeping only the passages a quiz needs, instead of sending whole PDFs
+import hashlib
+import io
+import math
+import re
+from collections import Counter
+
+import config
+
+
+# Lines this close to the top or bottom of a page are header/footer candidates
+EDGE_LINES = 3
+
+# Paragraphs are grouped into passages of about this many characters
+PASSAGE_CHARS = 1500
+
+WORD_PATTERN = re.compile(r"\w{3,}", re.UNICODE)
+
+# Words of the custom prompts' instructions that say nothing about which passages matter
+FOCUS_STOP_WORDS = set("""
+the and for are but not you all any can her was one our out has have had with this that these those from they them
+their there what when where which who why how will would should could about into over than then also only just more
+most some such each very make made question questions quiz quizzes answer answers choice choices image images
+don't dont include including like please must need needs want students student level easy hard words word
+english german french spanish arabic language sentence sentences
+""".split())
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough Gemini token count (about 4 characters per token)."""
+    return math.ceil(len(text) / 4)
+
+
+def extract_pages(pdf_bytes: bytes) -> list:
+    """Returns the text of every page of the PDF ("" for the pages without a text layer)."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+
+    pages = []
+    for page in reader.pages:
+        try:
+            pages.append(page.extract_text() or "")
+        except Exception as e:
+            print("Couldn't extract the text of a PDF page:", e)
+            pages.append("")
+
+    return pages
+
+
+def _line_signature(line: str) -> str:
+    """Normalizes a line so the same header/footer matches on every page (page numbers differ)."""
+    return re.sub(r"\d+", "#", " ".join(line.lower().split()))
+
+
+def clean_pages(pages: list) -> list:
+    """
+    Removes the repeated headers and footers and the duplicate pages
+    Args:
+        pages (list): Text of each page
+    Returns:
+        list: (page number starting at 1, cleaned text) of the kept pages
+    """
+    pages_lines = [[line for line in page.splitlines() if line.strip()] for page in pages]
+
+    # Lines showing at the top or bottom of many pages are headers, footers or page numbers
+    edge_counts = Counter()
+    for lines in pages_lines:
+        edge_counts.update({_line_signature(line) for line in lines[:EDGE_LINES] + lines[-EDGE_LINES:]})
+
+    min_repeats = max(3, len(pages) // 2)
+    repeated = {signature for signature, count in edge_counts.items() if count >= min_repeats}
+
+    cleaned_pages = []
+    seen_pages = set()
+
+    for page_number, lines in enumerate(pages_lines, start=1):
+        kept_lines = [
+            line for i, line in enumerate(lines)
+            if not ((i < EDGE_LINES or i >= len(lines) - EDGE_LINES) and _line_signature(line) in repeated)
+        ]
+        text = "\n".join(kept_lines).strip()
+
+        digest = hashlib.sha256(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+        if not text or digest in seen_pages:
+            continue  # Empty or duplicate page
+
+        seen_pages.add(digest)
+        cleaned_pages.append((page_number, text))
+
+    return cleaned_pages
+
+
+def split_passages(cleaned_pages: list, source_index: int) -> list:
+    """Groups the paragraphs of the pages into passages of about PASSAGE_CHARS characters."""
+    passages = []
+
+    for page_number, text in cleaned_pages:
+        current = ""
+        for paragraph in re.split(r"\n\s*\n|(?<=[.!?:])\n", text):
+            paragraph = " ".join(paragraph.split())
+            if not paragraph:
+                continue
+
+            if current and len(current) + len(paragraph) > PASSAGE_CHARS:
+                passages.append({"source": source_index, "page": page_number, "text": current})
+                current = ""
+
+            current = f"{current}\n{paragraph}" if current else paragraph
+
+        if current:
+            passages.append({"source": source_index, "page": page_number, "text": current})
+
+    return passages
+
+
+def select_passages(passages: list, token_budget: int, focus: str = None) -> list:
+    """
+    Picks the passages to send, up to the token budget
+    Args:
+        passages (list): Passages in document order
+        token_budget (int): Maximum tokens of the selected passages
+        focus (str): Text describing what the quiz is about (topic, custom prompt), if any
+    Returns:
+        list: Selected passages, in document order
+    """
+    if sum(estimate_tokens(passage["text"]) for passage in passages) <= token_budget:
+        return passages
+
+    # Scoring the passages by the focus words they contain (rarer words count more), with a small bonus
+    # spreading the picks over the whole document so the quiz still covers all of it
+    passage_words = [Counter(word.lower() for word in WORD_PATTERN.findall(passage["text"])) for passage in passages]
+    focus_words = {word.lower() for word in WORD_PATTERN.findall(focus or "")} - FOCUS_STOP_WORDS
+    document_frequency = Counter(word for words in passage_words for word in set(words) if word in focus_words)
+
+    def relevance(i: int) -> float:
+        return sum(
+            (1 + math.log(passage_words[i][word])) * math.log(1 + len(passages) / document_frequency[word])
+            for word in focus_words if passage_words[i][word]
+        )
+
+    scores = [relevance(i) for i in range(len(passages))]
+    best_score = max(scores) or 1
+
+    # Evenly spaced passages rank first among equally relevant ones
+    average_tokens = sum(estimate_tokens(passage["text"]) for passage in passages) / len(passages)
+    stride = max(1, round(len(passages) / max(1, token_budget / average_tokens)))
+    ranking = sorted(range(len(passages)), key=lambda i: (-round(scores[i] / best_score, 1), i % stride != 0, i))
+
+    selected = set()
+    used_tokens = 0
+    for i in ranking:
+        tokens = estimate_tokens(passages[i]["text"])
+        if used_tokens + tokens > token_budget:
+            continue
+
+        selected.add(i)
+        used_tokens += tokens
+
+    return [passages[i] for i in sorted(selected)]
+
+
+def format_passages(passages: list, sources_count: int) -> str:
+    """Joins the passages with a header giving their source and page, so the model knows where each one comes from."""
+    blocks = []
+    for passage in passages:
+        source = f"PDF {passage['source'] + 1}, " if sources_count > 1 else ""
+        blocks.append(f"[{source}page {passage['page']}]\n{passage['text']}")
+
+    return "\n\n".join(blocks)
+
+
+def extract_page_range(pdf_bytes: bytes, page_numbers: list) -> bytes:
+    """Returns a PDF with only the given pages (numbered from 1), keeping their images and layout."""
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    writer = PdfWriter()
+
+    for page_number in sorted(set(page_numbers)):
+        writer.add_page(reader.pages[page_number - 1])
+
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def prepare_pdf_sources(pdfs_bytes: list, questions_num: int, focus: str = None, mode: str = "text") -> tuple:
+    """
+    Reduces the source PDFs to the passages the quiz needs
+    Args:
+        pdfs_bytes (list): List of PDF files (bytes)
+        questions_num (int): Number of questions in the quiz, the token budget scales with it
+        focus (str): Text describing what the quiz is about (topic, custom prompt), if any
+        mode (str): "text" sends the selected passages as text, "pages" uploads only the PDF pages they
+                    come from, "file" uploads the whole PDFs (no preprocessing)
+    Returns:
+        tuple: (text of the selected passages, PDFs to upload with the File API, stats dict)
+    """
+    stats = {"pages": 0, "source_tokens": 0, "selected_tokens": 0, "uploaded_pdfs": 0}
+
+    if mode == "file" or not pdfs_bytes:
+        stats["uploaded_pdfs"] = len(pdfs_bytes)
+        return "", list(pdfs_bytes), stats
+
+    token_budget = max(config.PDF_MIN_TOKENS, questions_num * config.PDF_TOKENS_PER_QUESTION)
+
+    passages = []
+    pdfs_to_upload = []  # PDFs without a usable text layer (scans) are sent whole
+    text_sources = []  # Indexes in pdfs_bytes of the PDFs turned into passages
+
+    for source_index, pdf_bytes in enumerate(pdfs_bytes):
+        try:
+            pages = extract_pages(pdf_bytes)
+        except Exception as e:
+            print("Couldn't read the PDF, uploading it whole:", e)
+            pdfs_to_upload.append(pdf_bytes)
+            continue
+
+        stats["pages"] += len(pages)
+        cleaned_pages = clean_pages(pages)
+
+        if not pages or sum(len(text) for _, text in cleaned_pages) / len(pages) < config.PDF_MIN_CHARS_PER_PAGE:
+            pdfs_to_upload.append(pdf_bytes)
+            continue
+
+        text_sources.append(source_index)
+        passages.extend(split_passages(cleaned_pages, source_index))
+
+    stats["source_tokens"] = sum(estimate_tokens(passage["text"]) for passage in passages)
+
+    selected = select_passages(passages, token_budget, focus)
+    stats["selected_tokens"] = sum(estimate_tokens(passage["text"]) for passage in selected)
+
+    if mode == "pages":
+        for source_index in text_sources:
+            page_numbers = [passage["page"] for passage in selected if passage["source"] == source_index]
+            if page_numbers:
+                pdfs_to_upload.append(extract_page_range(pdfs_bytes[source_index], page_numbers))
+        text = ""
+    else:
+        text = format_passages(selected, len(pdfs_bytes))
+
+    stats["uploaded_pdfs"] = len(pdfs_to_upload)
+    return text, pdfs_to_upload, stats
@@ -0,0 +1,135 @@
+# SQLite cache of generated quizzes, so identical requests don't cost another Gemini round trip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import config
+
+
+class QuizCache:
+    """
+    Generated quiz data keyed by a canonical hash of everything that went into the prompt.
+
+    Each operation opens its own short-lived connection, so the cache can be used from
+    any thread and by several processes sharing the same file. Entries expire after the
+    TTL, and the least recently used ones are evicted when the cache is over its size cap.
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttl: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0}
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS quizzes (
+                    key TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            connection.execute("CREATE INDEX IF NOT EXISTS quizzes_accessed_at ON quizzes (accessed_at)")
+
+    @contextmanager
+    def _connect(self):
+        """Yields a connection committing on success, rolling back on error, and always closed."""
+        connection = sqlite3.connect(self.path, timeout=10)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def make_key(**inputs) -> str:
+        """
+        Hashes the generation inputs into a cache key
+        Args:
+            inputs: JSON-serializable inputs, except "pdfs_bytes" (a list of bytes) which is hashed by content
+        Returns:
+            str: SHA-256 hex digest of the canonical JSON of the inputs
+        """
+        inputs["pdfs_bytes"] = [hashlib.sha256(pdf_bytes).hexdigest() for pdf_bytes in inputs.get("pdfs_bytes") or []]
+        canonical = json.dumps(inputs, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Returns the cached quiz data, or None on a miss."""
+        now = time.time()
+
+        with self._connect() as connection:
+            row = connection.execute("SELECT data, created_at FROM quizzes WHERE key = ?", (key,)).fetchone()
+
+            if row and now - row[1] > self.ttl:
+                connection.execute("DELETE FROM quizzes WHERE key = ?", (key,))
+                row = None
+
+            if row:
+                connection.execute("UPDATE quizzes SET accessed_at = ? WHERE key = ?", (now, key))
+
+        with self._lock:
+            self._counters["hits" if row else "misses"] += 1
+
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, quiz_data: dict):
+        """Stores the quiz data then evicts the expired and least recently used entries if over the size cap."""
+        data = json.dumps(quiz_data, ensure_ascii=False)
+        now = time.time()
+
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO quizzes (key, data, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data.encode("utf-8")), now, now),
+            )
+            connection.execute("DELETE FROM quizzes WHERE created_at < ?", (now - self.ttl,))
+
+            total_size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM quizzes").fetchone()[0]
+            if total_size <= self.max_bytes:
+                return
+
+            # Removing the least recently used entries until the cache is back under 90% of its cap
+            evicted_keys = []
+            for old_key, size in connection.execute("SELECT key, size FROM quizzes ORDER BY accessed_at"):
+                evicted_keys.append((old_key,))
+                total_size -= size
+                if total_size <= self.max_bytes * 0.9:
+                    break
+
+            connection.executemany("DELETE FROM quizzes WHERE key = ?", evicted_keys)
+
+    def stats(self) -> dict:
+        """Returns the hit/miss counters of this process."""
+        with self._lock:
+            return dict(self._counters)
+
+
+_quiz_cache = None
+_quiz_cache_lock = threading.Lock()
+
+
+def get_quiz_cache() -> QuizCache:
+    """Returns the process-wide quiz cache, created on first use from the config."""
+    global _quiz_cache
+
+    with _quiz_cache_lock:
+        if _quiz_cache is None:
+            _quiz_cache = QuizCache(
+                path=config.QUIZ_CACHE_FILE,
+                max_bytes=config.QUIZ_CACHE_MAX_MB * 1024 * 1024,
+                ttl=config.QUIZ_CACHE_TTL,
+            )
+
+        return _quiz_cache
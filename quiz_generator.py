@@ -0,0 +1,346 @@
+# Generating the quiz questions with Gemini, independent of the Streamlit UI
+import json
+import difflib
+import math
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config
+import metrics
+from admission import get_admission_controller
+from clients import get_gemini_client
+from gemini_files import get_file_cache
+from json_stream import QuestionStreamParser
+from pdf_sources import prepare_pdf_sources
+from gemini_router import call_models
+from quiz_cache import get_quiz_cache
+
+
+def is_near_duplicate(question: dict, other_questions: list, threshold: float) -> bool:
+    """Checks if a question's text is too similar to any of the other questions."""
+    text = " ".join(question["question"].lower().split())
+
+    for other in other_questions:
+        other_text = " ".join(other["question"].lower().split())
+        if difflib.SequenceMatcher(None, text, other_text).ratio() >= threshold:
+            return True
+
+    return False
+
+
+def generate_quiz_data(
+    title: str,
+    language: str,
+    questions_num: int,
+    pdfs_bytes: list = [],
+    source_text: str = None,
+    topic: str = None,
+    description: str = None,
+    custom_prompt: str = None,
+    on_question=None,
+    on_status=None,
+    use_cache: bool = True,
+):
+    """
+    Generates quiz data from multiple PDF files
+    Args:
+        title (str): Quiz title
+        language (str): Language of the quiz
+        questions_num (int): Number of questions in the quiz
+        pdfs_bytes (list): List of PDF files
+        source_text (str): Source text for the quiz
+        topic (str): Topic for the quiz
+        description (str): Description for the quiz
+        custom_prompt (str): Custom prompt for the AI model
+        on_question (callable): If given, on_question(index, question) is called for each question as soon as it's complete
+        on_status (callable): If given, on_status(text) is called when a new stage starts
+        use_cache (bool): Whether to reuse a quiz generated earlier with the same inputs (the new quiz is cached either way)
+    Returns:
+        str: Model output (quiz data in JSON format)
+    """
+
+    stopwatch = metrics.Stopwatch(run_id=metrics.new_run_id())
+
+    # Reusing the quiz of an identical earlier request
+    cache_key = None
+    if config.QUIZ_CACHE_TTL:
+        cache_key = get_quiz_cache().make_key(
+            title=title, language=language, questions_num=questions_num, pdfs_bytes=pdfs_bytes, source_text=source_text,
+            topic=topic, description=description, custom_prompt=custom_prompt, models=config.GEMINI_MODELS,
+        )
+
+        quiz_data = get_quiz_cache().get(cache_key) if use_cache else None
+        if quiz_data:
+            if on_question is not None:
+                for i, question in enumerate(quiz_data["questions"]):
+                    on_question(i, question)
+
+            stopwatch.total("gemini.generate_quiz_data", questions=len(quiz_data["questions"]), cache_hit=True)
+            return quiz_data
+
+    # Waiting in line for a generation slot when too many quizzes are being generated
+    def show_position(position: int):
+        if on_status:
+            on_status(f"Waiting for a free spot, you're number {position} in line...")
+
+    with get_admission_controller().generations.slot(on_wait=show_position):
+        stopwatch.lap("admission.generation_slot")
+
+        quiz_data = _generate_quiz_data(
+            stopwatch, title, language, questions_num, pdfs_bytes, source_text, topic, description, custom_prompt, on_question, on_status,
+        )
+
+    # Always setting the type of Q1 to Multiple Choice to avoid errors in Kahoot
+    # (here rather than in _generate_quiz_data, whose first question isn't Q1 when it generates replacements)
+    quiz_data["questions"][0]["type"] = "multiple_choice"
+
+    if cache_key:
+        get_quiz_cache().put(cache_key, quiz_data)
+
+    stopwatch.total("gemini.generate_quiz_data", questions=len(quiz_data["questions"]), cache_hit=False)
+
+    return quiz_data
+
+
+def regenerate_questions(
+    quiz_data: dict,
+    indexes: list,
+    title: str,
+    language: str,
+    pdfs_bytes: list = [],
+    source_text: str = None,
+    topic: str = None,
+    description: str = None,
+    custom_prompt: str = None,
+    on_status=None,
+) -> dict:
+    """
+    Replaces some questions of a quiz, generating only those (the PDFs uploaded for the quiz are reused)
+    Args:
+        quiz_data (dict): Quiz data
+        indexes (list): Indexes of the questions to replace
+        title, language, pdfs_bytes, source_text, topic, description, custom_prompt: The quiz's inputs, as given to generate_quiz_data
+        on_status (callable): If given, on_status(text) is called when a new stage starts
+    Returns:
+        dict: New quiz data, with the other questions unchanged and in place
+    """
+
+    stopwatch = metrics.Stopwatch(run_id=metrics.new_run_id())
+    indexes = sorted(set(indexes))
+
+    # Asking only for the replacements, with every current question to stay away from
+    existing_questions = "\n".join(f"- {question['question']}" for question in quiz_data["questions"])
+    instructions = f"These questions are already in the quiz (or were rejected), don't repeat them or their ideas:\n{existing_questions}"
+
+    def show_position(position: int):
+        if on_status:
+            on_status(f"Waiting for a free spot, you're number {position} in line...")
+
+    with get_admission_controller().generations.slot(on_wait=show_position):
+        stopwatch.lap("admission.generation_slot")
+
+        new_data = _generate_quiz_data(
+            stopwatch, title, language, len(indexes), pdfs_bytes, source_text, topic, description, custom_prompt, None, on_status, instructions,
+        )
+
+    # Dropping the new questions too similar to the current ones (or to each other)
+    new_questions = []
+    for question in new_data["questions"]:
+        if not is_near_duplicate(question, quiz_data["questions"] + new_questions, config.DUPLICATE_QUESTION_SIMILARITY):
+            new_questions.append(question)
+
+    questions = list(quiz_data["questions"])
+    for i, question in zip(indexes, new_questions):
+        questions[i] = question
+
+    if len(new_questions) < len(indexes):
+        print(f"Only {len(new_questions)} of the {len(indexes)} regenerated questions were new, keeping the others")
+
+    # Always setting the type of Q1 to Multiple Choice to avoid errors in Kahoot
+    questions[0] = {**questions[0], "type": "multiple_choice"}
+
+    stopwatch.total("gemini.regenerate_questions", questions=len(indexes), replaced=min(len(indexes), len(new_questions)), total_questions=len(questions))
+
+    return {**quiz_data, "questions": questions}
+
+
+def _generate_quiz_data(stopwatch, title, language, questions_num, pdfs_bytes, source_text, topic, description, custom_prompt, on_question, on_status, instructions=None) -> dict:
+    """Generates the quiz with Gemini, the arguments being generate_quiz_data's (after the cache and the admission) plus extra prompt instructions."""
+
+    # The Gemini client is shared by all the generations
+    client = get_gemini_client()
+
+    if on_status:
+        on_status("Analyzing your sources...")
+
+    # Keeping only the PDF passages this quiz needs, scanned PDFs are still uploaded whole
+    focus = "\n".join(text for text in [title, topic, description, custom_prompt] if text)
+    pdf_text, pdfs_to_upload, pdf_stats = prepare_pdf_sources(pdfs_bytes, questions_num, focus, config.PDF_SOURCE_MODE)
+    stopwatch.lap("pdf.prepare_sources", mode=config.PDF_SOURCE_MODE, **pdf_stats)
+
+    # Uploading the remaining source files with the File API
+    # Identical PDFs are uploaded only once and reused until they expire on Gemini's side
+    uploaded_files = get_file_cache().upload_pdfs(client, pdfs_to_upload)
+    stopwatch.lap("gemini.upload_files", files=len(pdfs_to_upload))
+
+    # Creating the prompt
+    pdf_section = f"Source Documents (the relevant passages, with their pages):\n{pdf_text}" if pdf_text else ""
+
+    def build_prompt(questions_count: int, extra_instructions: str = None) -> str:
+        return f"""
+Generate quiz data which includes questions, choices, answers and images based on the given sources.
+Quiz Title: {title}
+{f"Description: {description}" if description else ""}
+Language: {language}. All questions and choices should be in this language.
+Number of Questions: {questions_count}
+{f"Source Text: {source_text}" if source_text else ""}
+{pdf_section}
+{f"Topic: {topic}" if topic else ""}{f". Generate the quiz data based on it." if not source_text and not pdfs_bytes else ""}
+You should return the output in JSON format with no extra text, in this exact structure:
+{{
+    "questions": [
+        {{
+            "type": "multiple_choice / true_or_false", (These are the only 2 options)
+            "question": "Question 1",
+            "choices": ["Choice 1", "Choice 2", "Choice 3", "Choice 4"],
+            "answer": 0 (the index of the correct choice),
+            "image": "image description here" (Only if the image is needed as part of the question or refrence to it else set it to null + The image should not reveal the answer)
+        }},
+        {{
+            "type": "multiple_choice / true_or_false",
+            "question": "Question 2",
+            "choices": ["Choice 1", "Choice 2"] (2 choices if true or false question, 4 choices if multiple choice question),
+            "answer": 1,
+            "image": "a google image friendly search keyword" (Make it Google-Images-friendly keyword, short and desciptive. Only if the image is needed as part or refrence for the question else set it to null)
+        }}
+    ],
+    "cover_image": "image description here"
+}}
+Notes:
+1. You don't have to put images in all question. Only add images when the questions needs it, not for decoration or visualization.
+{f"Here is a custom prompt for instructions from the user: {custom_prompt}" if custom_prompt else ""}
+{instructions or ""}
+{extra_instructions or ""}
+"""
+
+    def generate(gemini_model: str, prompt: str, on_question=None) -> str:
+        """Returns the full model output, streaming the questions to on_question if given."""
+        if on_question is None:
+            response = client.models.generate_content(
+                model=gemini_model,
+                contents=[prompt, *uploaded_files],
+                config={
+                    "response_mime_type": "application/json",
+                    "http_options": {"timeout": config.GEMINI_TIMEOUT * 1000},
+                },
+            )
+            return response.text
+
+        parser = QuestionStreamParser()
+        output = ""
+        questions_count = 0
+
+        for chunk in client.models.generate_content_stream(
+            model=gemini_model,
+            contents=[prompt, *uploaded_files],
+            config={
+                "response_mime_type": "application/json",
+                "http_options": {"timeout": config.GEMINI_TIMEOUT * 1000},
+            },
+        ):
+            if not chunk.text:
+                continue
+
+            output += chunk.text
+            for question in parser.feed(chunk.text):
+                on_question(questions_count, question)
+                questions_count += 1
+
+        return output
+
+    def generate_quiz(prompt: str, on_question=None) -> dict:
+        def call(gemini_model: str, emit) -> dict:
+            output = generate(gemini_model, prompt, (lambda i, question: emit(question)) if emit else None)
+            output = output.replace("```json", "")
+
+            # An invalid response fails the attempt, so another model's response can win
+            quiz_data = json.loads(output)
+            if not quiz_data.get("questions"):
+                raise ValueError(f"{gemini_model} returned no questions")
+
+            return quiz_data
+
+        # Trying the models in order, hedging on the next one if the current one is slow
+        return call_models(
+            config.GEMINI_MODELS,
+            call,
+            on_question=on_question,
+            timeout=config.GEMINI_TIMEOUT,
+            hedge_after=config.GEMINI_HEDGE_AFTER,
+            **stopwatch.attributes,
+        )
+
+    def generate_shard(shard_index: int, shards_count: int, questions_count: int) -> dict:
+        """Generates one batch of a sharded quiz, retrying it on its own if it fails."""
+        shard_instructions = f"""
+This request is part {shard_index + 1} of {shards_count} of a {questions_num}-question quiz, and the other parts are generated separately at the same time.
+- Split the sources (or the topic) into {shards_count} roughly equal sub-topics in their natural order and only ask about sub-topic number {shard_index + 1}.
+- If the custom prompt asks for specific numbers of questions, they are for the whole quiz, so only generate this part's proportional share of them.
+- Variation seed: {random.randint(0, 10 ** 6)}
+"""
+        for attempt in range(config.QUIZ_SHARD_RETRIES + 1):
+            try:
+                return generate_quiz(build_prompt(questions_count, shard_instructions))
+            except Exception as e:
+                print(f"Shard {shard_index + 1}/{shards_count} failed (attempt {attempt + 1}):", e)
+                if attempt == config.QUIZ_SHARD_RETRIES:
+                    raise
+
+    # Generating the quiz data
+    if on_status:
+        on_status("Generating your quiz questions...")
+
+    shard_size = config.QUIZ_SHARD_SIZE
+
+    if not shard_size or questions_num <= shard_size:
+        quiz_data = generate_quiz(build_prompt(questions_num), on_question)
+
+    else:
+        # Generating batches of questions concurrently, so the latency follows the slowest batch instead of the total count
+        shards_count = math.ceil(questions_num / shard_size)
+        shard_sizes = [questions_num // shards_count + (1 if i < questions_num % shards_count else 0) for i in range(shards_count)]
+
+        questions = []
+        cover_image = None
+
+        with ThreadPoolExecutor(max_workers=config.QUIZ_SHARD_WORKERS, thread_name_prefix="quiz-shard") as executor:
+            futures = [executor.submit(generate_shard, i, shards_count, size) for i, size in enumerate(shard_sizes)]
+
+            for future in as_completed(futures):
+                shard_data = future.result()
+                cover_image = cover_image or shard_data.get("cover_image")
+
+                for question in shard_data["questions"]:
+                    if not is_near_duplicate(question, questions, config.DUPLICATE_QUESTION_SIMILARITY):
+                        if on_question is not None:
+                            on_question(len(questions), question)
+                        questions.append(question)
+
+        # Filling the questions dropped as duplicates with one more request
+        missing_count = questions_num - len(questions)
+        if missing_count > 0:
+            existing_questions = "\n".join(f"- {question['question']}" for question in questions)
+            top_up_data = generate_quiz(build_prompt(missing_count, f"These questions already exist in the quiz, don't repeat them or their ideas:\n{existing_questions}"))
+
+            for question in top_up_data["questions"]:
+                if not is_near_duplicate(question, questions, config.DUPLICATE_QUESTION_SIMILARITY):
+                    if on_question is not None:
+                        on_question(len(questions), question)
+                    questions.append(question)
+
+        questions = questions[:questions_num]
+        random.shuffle(questions)
+
+        quiz_data = {"questions": questions, "cover_image": cover_image}
+
+    return quiz_data
@@ -0,0 +1,251 @@
+# Opt-in tracing of the WebDriver commands and wait helpers of a Kahoot creation, written as a flame graph profile and a summary table
+import functools
+import os
+import time
+from contextlib import contextmanager
+
+import config
+
+
+def _describe(args: tuple) -> str:
+    """Returns the locator of a helper's arguments (by, locator, ...), or the names of wait_for_any's conditions."""
+    if len(args) >= 2 and isinstance(args[0], str) and isinstance(args[1], str):
+        by = {"css selector": "css", "class name": "class"}.get(args[0], args[0])
+        return f"{by}={args[1]}"
+    if args and isinstance(args[0], dict) and all(callable(condition) for condition in args[0].values()):
+        return "|".join(args[0])
+    return ""
+
+
+def traced(func):
+    """
+    Decorates a helper taking the driver first (wait_and_click...), so it shows as a frame of its
+    own when the driver is traced. Untraced drivers call the helper directly.
+    """
+    @functools.wraps(func)
+    def wrapper(driver, *args, **kwargs):
+        tracer = getattr(driver, "_webdriver_tracer", None)
+        if tracer is None:
+            return func(driver, *args, **kwargs)
+
+        with tracer.helper(func.__name__, _describe(args)):
+            return func(driver, *args, **kwargs)
+
+    return wrapper
+
+
+class _HelperFrame:
+    def __init__(self, name: str, locator: str):
+        self.label = f"{name}({locator})" if locator else name
+        self.started_at = time.perf_counter()
+        self.duration = 0
+        self.commands_duration = 0  # Time spent in commands (the rest is polling sleeps and Python)
+        self.commands = 0
+        self.polls = 0  # Element lookups, one per WebDriverWait poll
+        self.stale = 0  # StaleElementReferenceException raised by its commands
+        self.error = None
+
+
+class WebDriverTracer:
+    """
+    Records every WebDriver command of a driver (by wrapping driver.execute, which the
+    elements' commands go through too) and every traced helper call.
+
+    Commands and helper calls are assigned to the stopwatch's steps when the laps are
+    recorded, so the steps don't need to be marked twice: everything since the previous lap
+    belongs to the lap being recorded ("kahoot.question" laps being split per question).
+    """
+
+    def __init__(self, stopwatch):
+        self.stopwatch = stopwatch
+        self.started_at = time.perf_counter()
+
+        self.commands = []  # (step, helper labels, command, seconds, error)
+        self.helpers = []  # (step, helper labels, _HelperFrame)
+        self.steps = []  # (step, seconds) in order
+
+        self._stack = []  # Helper frames being run
+        self._pending_commands = []
+        self._pending_helpers = []
+
+        stopwatch.on_lap = self._on_lap
+
+    # Recording
+    def attach(self, driver):
+        """Starts tracing a driver, until detach (a pooled driver must be detached before it's released)."""
+        execute = driver.execute
+
+        def traced_execute(driver_command, params=None):
+            start = time.perf_counter()
+            error = None
+
+            try:
+                return execute(driver_command, params)
+            except Exception as e:
+                error = type(e).__name__
+                raise
+            finally:
+                duration = time.perf_counter() - start
+                self._pending_commands.append((tuple(frame.label for frame in self._stack), driver_command, duration, error))
+
+                if self._stack:
+                    frame = self._stack[-1]
+                    frame.commands += 1
+                    frame.commands_duration += duration
+                    frame.polls += driver_command in ("findElement", "findElements")
+                    frame.stale += error == "StaleElementReferenceException"
+
+        driver.execute = traced_execute
+        driver._webdriver_tracer = self
+
+    def detach(self, driver):
+        driver.__dict__.pop("execute", None)
+        driver.__dict__.pop("_webdriver_tracer", None)
+
+    @contextmanager
+    def tracing(self, driver):
+        """Traces the driver for the duration of the block."""
+        self.attach(driver)
+        try:
+            yield driver
+        finally:
+            self.detach(driver)
+
+    @contextmanager
+    def helper(self, name: str, locator: str):
+        """Frames a helper call, the commands run inside it being its children."""
+        frame = _HelperFrame(name, locator)
+        parents = tuple(parent.label for parent in self._stack)
+        self._stack.append(frame)
+
+        try:
+            yield frame
+        except BaseException as e:
+            frame.error = type(e).__name__
+            raise
+        finally:
+            self._stack.pop()
+            frame.duration = time.perf_counter() - frame.started_at
+            self._pending_helpers.append((parents, frame))
+
+            # A nested helper's time isn't its parent's own time
+            if self._stack:
+                self._stack[-1].commands_duration += frame.duration
+
+    def _on_lap(self, name: str, duration: float, attributes: dict):
+        step = f"{name} {attributes['index'] + 1}" if name == "kahoot.question" and "index" in attributes else name
+        self.steps.append((step, duration))
+
+        self.commands += [(step,) + command for command in self._pending_commands]
+        self.helpers += [(step, parents, frame) for parents, frame in self._pending_helpers]
+        self._pending_commands, self._pending_helpers = [], []
+
+    def _flush_unfinished(self):
+        if self._pending_commands or self._pending_helpers:
+            self._on_lap("unfinished", 0, {})
+
+    # Output
+    def folded_stacks(self) -> str:
+        """
+        Returns the profile in the folded stacks format of flame graph tools (flamegraph.pl,
+        speedscope, inferno): one "frame;frame;frame microseconds" line per stack.
+        """
+        totals = {}
+
+        def add(frames: tuple, seconds: float):
+            # ";" separates the frames, so it can't be part of one (a CSS selector could hold one)
+            stack = ";".join(frame.replace(";", ",") for frame in ("create_kahoot_quiz", *frames))
+            totals[stack] = totals.get(stack, 0) + seconds
+
+        for step, helpers, command, seconds, error in self.commands:
+            add((*_step_frames(step), *helpers, command + (f" [{error}]" if error else "")), seconds)
+
+        # The helpers' own time: polling sleeps and Python between the commands
+        for step, parents, frame in self.helpers:
+            add((*_step_frames(step), *parents, frame.label), max(0, frame.duration - frame.commands_duration))
+
+        return "".join(f"{stack} {round(seconds * 1e6)}\n" for stack, seconds in sorted(totals.items()) if round(seconds * 1e6))
+
+    def summary(self, top: int = 15) -> str:
+        """Returns a text table of the slowest helper calls by locator, the steps and the questions."""
+        lines = []
+
+        # Helper calls grouped by helper and locator
+        by_label = {}
+        for step, parents, frame in self.helpers:
+            by_label.setdefault(frame.label, []).append(frame)
+
+        lines.append(f"{'Slowest waits (helper and locator)':<70} {'calls':>5} {'total s':>8} {'avg ms':>8} {'max ms':>8} {'polls':>6} {'cmds':>5} {'stale':>5} {'errors':>6}")
+        for label, frames in sorted(by_label.items(), key=lambda item: -sum(frame.duration for frame in item[1]))[:top]:
+            total = sum(frame.duration for frame in frames)
+            lines.append(
+                f"{_clip(label, 70):<70} {len(frames):>5} {total:>8.2f} {total / len(frames) * 1000:>8.0f} {max(frame.duration for frame in frames) * 1000:>8.0f}"
+                f" {sum(frame.polls for frame in frames) / len(frames):>6.1f} {sum(frame.commands for frame in frames) / len(frames):>5.1f}"
+                f" {sum(frame.stale for frame in frames):>5} {sum(1 for frame in frames if frame.error):>6}"
+            )
+
+        # Steps, the questions merged into one line
+        commands_per_step = {}
+        for command in self.commands:
+            commands_per_step[command[0]] = commands_per_step.get(command[0], 0) + 1
+
+        lines.append("")
+        lines.append(f"{'Step':<30} {'count':>5} {'total s':>8} {'avg s':>7} {'commands':>9} {'cmds/step':>9}")
+
+        merged = {}
+        for step, seconds in self.steps:
+            name = "kahoot.question" if step.startswith("kahoot.question") else step
+            entry = merged.setdefault(name, [0, 0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += commands_per_step.get(step, 0)
+
+        for name, (count, seconds, commands) in merged.items():
+            lines.append(f"{name:<30} {count:>5} {seconds:>8.2f} {seconds / count:>7.2f} {commands:>9} {commands / count:>9.1f}")
+
+        # Slowest questions
+        questions = [(step, seconds) for step, seconds in self.steps if step.startswith("kahoot.question")]
+        if questions:
+            lines.append("")
+            lines.append("Slowest questions: " + ", ".join(
+                f"{step.rsplit(' ', 1)[1]} ({seconds:.2f}s, {commands_per_step.get(step, 0)} commands)"
+                for step, seconds in sorted(questions, key=lambda item: -item[1])[:5]
+            ))
+
+        lines.append(f"Total: {time.perf_counter() - self.started_at:.2f}s, {len(self.commands)} WebDriver commands")
+        return "\n".join(lines)
+
+    def write(self, directory: str = None) -> str:
+        """
+        Writes the profile (<run_id>.folded) and the summary (<run_id>.txt) of the traced run
+        Args:
+            directory (str): Folder of the traces, the configured one if not given
+        Returns:
+            str: Path of the profile
+        """
+        self._flush_unfinished()
+
+        directory = directory or config.KAHOOT_TRACE_DIR
+        os.makedirs(directory, exist_ok=True)
+        base_path = os.path.join(directory, self.stopwatch.attributes.get("run_id", "trace"))
+
+        summary = self.summary()
+        with open(base_path + ".folded", "w", encoding="utf-8") as file:
+            file.write(self.folded_stacks())
+        with open(base_path + ".txt", "w", encoding="utf-8") as file:
+            file.write(summary + "\n")
+
+        print(summary)
+        print("WebDriver trace written to", base_path + ".folded")
+        return base_path + ".folded"
+
+
+def _step_frames(step: str) -> tuple:
+    """Puts the questions under one "kahoot.question" frame, so the flame graph shows them side by side."""
+    if step.startswith("kahoot.question "):
+        return ("kahoot.question", "question " + step.rsplit(" ", 1)[1])
+    return (step,)
+
+
+def _clip(text: str, width: int) -> str:
+    return text if len(text) <= width else text[:width - 1] + "…"